@@ -0,0 +1,40 @@
+"""
+Cache observability endpoints
+"""
+
+from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.cache import cache, portfolio_tag, symbol_tag, table_tag
+from app.core.loop_monitor import loop_monitor
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_cache_stats():
+    """Cache statistics with per-prefix hit/miss/stale/eviction counters and miss latency"""
+    return cache.get_stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics():
+    """Cache metrics and event loop lag in Prometheus text format"""
+    body = cache.render_prometheus() + loop_monitor.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@router.post("/invalidate")
+async def invalidate_cache(
+    tag: List[str] = Query(default=[], description="Raw tags, e.g. symbol:NVDA"),
+    symbol: List[str] = Query(default=[], description="Entries derived from these symbols"),
+    table: List[str] = Query(default=[], description="Entries derived from these MotherDuck tables"),
+    portfolio: List[str] = Query(default=[], description="Entries derived from these portfolios"),
+):
+    """Evict every cache entry (memory and disk) carrying any of the given tags"""
+    tags = [
+        *tag,
+        *(symbol_tag(s) for s in symbol),
+        *(table_tag(t) for t in table),
+        *(portfolio_tag(p) for p in portfolio),
+    ]
+    if not tags:
+        raise HTTPException(status_code=400, detail="Specify at least one tag, symbol, table or portfolio")
+    return {"tags": sorted(set(tags)), "removed": cache.invalidate_tags(tags)}
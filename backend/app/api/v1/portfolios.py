@@ -2,24 +2,186 @@
 Portfolio API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.models.portfolio import PortfolioSummary
-from app.services.portfolio_service import portfolio_service
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.core.http_cache import dumps, response_cache
+from app.models.portfolio import PortfolioBatch, PortfolioSummary, StockHolding
+from app.services.portfolio_service import SUMMARY_SECTIONS, SUMMARY_VIEWS, portfolio_service
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
-async def list_portfolios():
-    """Get list of available portfolios"""
-    return await portfolio_service.get_portfolio_list()
+# Always returned, whatever the projection
+SUMMARY_HEADER_FIELDS = ("portfolio_id", "name", "description", "last_updated")
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def _parse_projection(view: str, include: Optional[str], fields: Optional[str]) -> Tuple[Set[str], Dict[str, Any]]:
+    """
+    Resolve view/include/fields query parameters
+    
+    Returns:
+        (sections to build, pydantic include spec for each holding)
+    
+    Raises:
+        ValueError: Unknown view, section or holding field
+    """
+    if view not in SUMMARY_VIEWS:
+        raise ValueError(f"Unknown view '{view}' (expected one of {', '.join(SUMMARY_VIEWS)})")
+    sections = set(SUMMARY_VIEWS[view])
+    if include is not None:
+        sections = set(_split(include))
+        unknown = sections - set(SUMMARY_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))} (expected {', '.join(SUMMARY_SECTIONS)})")
+    
+    holding_spec: Dict[str, Any] = {name: True for name in StockHolding.model_fields}
+    if fields is not None:
+        # symbol,weight,fundamentals.obq_value_score -> {"symbol": True, "weight": True, "fundamentals": {"obq_value_score"}}
+        holding_spec = {"symbol": True}
+        for field in _split(fields):
+            name, _, column = field.partition(".")
+            if name not in StockHolding.model_fields or (column and name != "fundamentals"):
+                raise ValueError(f"Unknown holding field: {field}")
+            if not column:
+                holding_spec[name] = True
+            elif holding_spec.get(name) is not True:
+                holding_spec.setdefault(name, set()).add(column)
+        sections.add("holdings")
+        if "fundamentals" in holding_spec:
+            sections.add("fundamentals")
+    
+    if "fundamentals" in sections:
+        sections.add("holdings")  # fundamentals are served inside each holding
+    else:
+        holding_spec.pop("fundamentals", None)
+    return sections, holding_spec
+
+def _include_spec(sections: Set[str], holding_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """pydantic include spec for a PortfolioSummary limited to sections"""
+    spec: Dict[str, Any] = {name: True for name in SUMMARY_HEADER_FIELDS}
+    for section in ("performance", "allocation", "metrics"):
+        if section in sections:
+            spec[section] = True
+    if "holdings" in sections:
+        spec["holdings"] = {"__all__": holding_spec}
+    return spec
+
+async def _ndjson(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode events as newline-delimited JSON (orjson, as the other responses); a failure mid-stream becomes a final error event"""
+    try:
+        async for event in events:
+            yield dumps(event) + b"\n"
+    except Exception as e:
+        print(f"Portfolio stream failed: {e}")
+        yield dumps({"event": "error", "detail": str(e)}) + b"\n"
+
+@router.get("/", response_model=Union[List[dict], PortfolioBatch])
+async def list_portfolios(
+    request: Request,
+    ids: Optional[str] = Query(None, description="Comma-separated portfolio ids (default: all)"),
+    expand: bool = Query(False, description="Return full summaries plus a household rollup instead of the list"),
+    view: str = Query("full", description="With expand: preset of sections per summary (full or summary)"),
+    include: Optional[str] = Query(None, description=f"With expand: comma-separated sections: {', '.join(SUMMARY_SECTIONS)}"),
+    fields: Optional[str] = Query(None, description="With expand: comma-separated holding fields"),
+):
+    """
+    Get list of available portfolios
+    
+    With expand=true, the summaries of the selected portfolios are built from
+    one shared fetch of the union of their symbols and returned together with
+    a "household" rollup of the combined exposure (per symbol, sector and
+    industry). view/include/fields project each summary as on /{portfolio_id};
+    the household is always complete.
+    """
+    portfolio_list = await portfolio_service.get_portfolio_list()
+    selected = _split(ids) or [p["id"] for p in portfolio_list]
+    unknown = [pid for pid in selected if pid not in {p["id"] for p in portfolio_list}]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Portfolio {', '.join(unknown)} not found")
+    if not expand:
+        return [p for p in portfolio_list if p["id"] in selected]
+    
+    try:
+        sections, holding_spec = _parse_projection(view, include, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        batch = await portfolio_service.get_portfolio_batch(selected, sections)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    spec = _include_spec(sections, holding_spec)
+    return response_cache.respond(
+        request,
+        key="batch|" + ";".join(_projection_key(pid, sections, holding_spec) for pid in batch.portfolios),
+        version=tuple(summary.last_updated for summary in batch.portfolios.values()),
+        build=lambda: {
+            "portfolios": {pid: summary.model_dump(include=spec) for pid, summary in batch.portfolios.items()},
+            "household": batch.household.model_dump(),
+        },
+    )
+
+def _projection_key(portfolio_id: str, sections: Set[str], holding_spec: Dict[str, Any]) -> str:
+    """Stable identity of one projection of a portfolio, for the response cache"""
+    holding_fields = ",".join(
+        name if spec is True else f"{name}.{'.'.join(sorted(spec))}" for name, spec in sorted(holding_spec.items())
+    )
+    return f"{portfolio_id}|{','.join(sorted(sections))}|{holding_fields}"
 
 @router.get("/{portfolio_id}", response_model=PortfolioSummary)
-async def get_portfolio(portfolio_id: str):
-    """Get portfolio summary by ID"""
+async def get_portfolio(
+    request: Request,
+    portfolio_id: str,
+    view: str = Query("full", description="Preset of sections: full, or summary (no fundamentals or performance)"),
+    include: Optional[str] = Query(None, description=f"Comma-separated sections, replacing the view's: {', '.join(SUMMARY_SECTIONS)}"),
+    fields: Optional[str] = Query(None, description="Comma-separated holding fields, e.g. symbol,weight,fundamentals.obq_value_score"),
+):
+    """
+    Get portfolio summary by ID
+    
+    Sections that are not requested are not computed either (fundamentals and
+    performance are the expensive ones), and are left out of the response.
+    Risk metrics need performance, so they are null in views without it
+    unless the full summary is already cached.
+    
+    Responses carry an ETag; a request with a matching If-None-Match gets
+    304 Not Modified. Bodies are encoded once per summary version and sent
+    gzip/br-compressed when the client accepts it.
+    """
+    try:
+        sections, holding_spec = _parse_projection(view, include, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        return await portfolio_service.get_portfolio_summary(portfolio_id)
+        summary = await portfolio_service.get_portfolio_sections(portfolio_id, sections)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return response_cache.respond(
+        request,
+        key=_projection_key(portfolio_id, sections, holding_spec),
+        version=summary.last_updated,
+        build=lambda: summary.model_dump(include=_include_spec(sections, holding_spec)),
+    )
+
+@router.get("/{portfolio_id}/stream")
+async def stream_portfolio(portfolio_id: str):
+    """
+    Portfolio summary as NDJSON, one event per line as each part resolves:
+    skeleton, then holding (one per priced holding), fundamentals and
+    performance as they complete, and finally summary (weights, allocation, metrics)
+    """
+    try:
+        events = portfolio_service.stream_portfolio_summary(portfolio_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        _ndjson(events),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
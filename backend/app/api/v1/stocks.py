@@ -2,12 +2,60 @@
 Stock API endpoints
 """
 
-from fastapi import APIRouter
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.services.stock_service import HISTORY_INTERVALS, MAX_QUOTE_SYMBOLS, normalize_symbols, stock_service
 
 router = APIRouter()
 
+# Declared before /{symbol} so "quotes" is not taken for a symbol
+@router.get("/quotes")
+async def get_quotes(symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT")):
+    """Latest quotes for many symbols in one batch (each cached briefly)"""
+    symbol_list = normalize_symbols(symbols.split(","))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbol_list) > MAX_QUOTE_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUOTE_SYMBOLS} symbols per request")
+    try:
+        return await stock_service.get_quotes(symbol_list)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/{symbol}/history")
+async def get_history(
+    symbol: str,
+    start: Optional[date] = Query(None, description="First date (default: one year ago)"),
+    end: Optional[date] = Query(None, description="Last date (default: latest completed session)"),
+    interval: str = Query("1d", description=f"Bar size: {', '.join(HISTORY_INTERVALS)}"),
+):
+    """Daily (or weekly/monthly) OHLCV bars from the local price store"""
+    try:
+        history = await stock_service.get_history(symbol, start, end, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    if not history["dates"]:
+        raise HTTPException(status_code=404, detail=f"No price history for {history['symbol']}")
+    return history
+
+@router.get("/{symbol}/fundamentals")
+async def get_fundamentals(symbol: str):
+    """MotherDuck fundamentals (GuruFocus + OBQ scores) for one symbol"""
+    try:
+        fundamentals = await stock_service.get_fundamentals(symbol)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    if fundamentals is None:
+        raise HTTPException(status_code=404, detail=f"No fundamentals for {symbol.upper()}")
+    return fundamentals
+
 @router.get("/{symbol}")
 async def get_stock(symbol: str):
-    """Get stock information by symbol"""
-    # TODO: Implement stock endpoint
-    return {"message": f"Stock endpoint for {symbol} - Coming soon"}
+    """Get stock information by symbol (quote plus reference data)"""
+    try:
+        return await stock_service.get_stock(symbol)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
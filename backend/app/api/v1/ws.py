@@ -0,0 +1,22 @@
+"""
+WebSocket endpoints for live data
+"""
+
+from fastapi import APIRouter, WebSocket
+from app.services.quote_hub import CLOSE_NOT_FOUND, quote_hub
+
+router = APIRouter()
+
+@router.websocket("/portfolios/{portfolio_id}")
+async def portfolio_quotes(websocket: WebSocket, portfolio_id: str):
+    """
+    Live prices for a portfolio's holdings: a snapshot, then only the fields
+    that change (see app.services.quote_hub for the message format)
+    """
+    await websocket.accept()
+    try:
+        subscriber = quote_hub.subscribe(portfolio_id)
+    except ValueError as e:
+        await websocket.close(code=CLOSE_NOT_FOUND, reason=str(e))
+        return
+    await quote_hub.serve(websocket, subscriber)
@@ -4,164 +4,714 @@ Enhanced multi-layer caching system with disk persistence
 
 Architecture:
 - Layer 1: In-memory cache (fast, volatile)
-- Layer 2: Disk cache (persistent, survives restarts)
+- Layer 2: Disk cache (persistent, survives restarts). Either one file per
+  key ("files") or a SQLite WAL database ("sqlite") shared by every worker
+  process on the host, with cross-process leases so only one worker
+  computes a missing key.
 - Layer 3: Smart TTL management (daily for fundamentals, 5min for prices)
+
+Entries may carry a soft TTL (``ttl``) and a longer hard TTL (``hard_ttl``).
+Between the two the entry is stale: ``@cached`` serves it immediately and
+refreshes it in the background (stale-while-revalidate).
+
+Entries may also carry tags naming what they were derived from
+(``symbol:NVDA``, ``table:OBQ_Scores``, ``portfolio:pure_alpha``), so that
+``cache.invalidate_tags()`` can evict exactly the affected entries from
+memory and disk when that data changes.
 """
 
-import time
+import sys
 import json
-import os
-import pickle
-from typing import Any, Optional
-from functools import wraps
+import time
+import enum
+import asyncio
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple, Union
+from functools import lru_cache, wraps
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from app.core.config import settings
+from app.core.disk_store import DiskStore
+from app.core.sqlite_store import SQLiteStore
+from app.core.metrics import cache_metrics
+from app.core.ttl_policy import TTLPolicy, resolve_ttl
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Approximate deep size of a cached value in bytes
+    
+    DataFrames/Series report their deep memory usage, pydantic models and
+    containers are walked recursively. Good enough for budget accounting,
+    not meant to be exact.
+    """
+    if _seen is None:
+        _seen = set()
+    obj_id = id(value)
+    if obj_id in _seen:
+        return 0
+    _seen.add(obj_id)
+    
+    # pandas objects (avoid importing pandas here)
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage) and hasattr(value, "dtypes"):
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        except Exception:
+            pass
+    
+    size = sys.getsizeof(value, 64)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        # pydantic models and plain objects
+        size += estimate_size(vars(value), _seen)
+    return size
+
+
+def symbol_tag(symbol: str) -> str:
+    """Tag for entries derived from a symbol's data"""
+    return f"symbol:{symbol.strip().upper()}"
+
+def table_tag(table: str) -> str:
+    """Tag for entries derived from a MotherDuck table"""
+    return f"table:{table}"
+
+def portfolio_tag(portfolio_id: str) -> str:
+    """Tag for entries derived from a portfolio's holdings"""
+    return f"portfolio:{portfolio_id}"
+
+
+class _CacheEntry:
+    """In-memory cache entry (stale after stale_at, gone after expiry)"""
+    __slots__ = ("value", "expiry", "stale_at", "size", "tags")
+    
+    def __init__(self, value: Any, expiry: float, stale_at: float, size: int, tags: FrozenSet[str] = frozenset()):
+        self.value = value
+        self.expiry = expiry
+        self.stale_at = stale_at
+        self.size = size
+        self.tags = tags
+
 
 class EnhancedCache:
     """Multi-layer cache with memory + disk persistence"""
     
-    def __init__(self, disk_cache_dir: str = "/tmp/jcn_cache"):
-        # Layer 1: In-memory cache (fast)
-        self._memory_cache = {}
+    def __init__(
+        self,
+        disk_cache_dir: str = "/tmp/jcn_cache",
+        max_entries: int = 2000,
+        max_bytes: int = 256 * 1024 * 1024,
+        sweep_interval: int = 60,
+        backend: str = "files",
+        lease_ttl: int = 60,
+    ):
+        # Layer 1: In-memory cache (fast, bounded, least recently used first)
+        self._memory_cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory_bytes = 0
+        self._tag_index: Dict[str, Set[str]] = {}  # tag -> keys in memory
+        self._evictions = 0
+        self._evicted_bytes = 0
+        self._expirations = 0
         
-        # Layer 2: Disk cache (persistent)
+        # Layer 2: Disk cache (persistent, loaded lazily on get)
         self.disk_cache_dir = Path(disk_cache_dir)
-        self.disk_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        if backend == "sqlite":
+            self._disk = SQLiteStore(self.disk_cache_dir)
+            # Shared between workers, so short-lived entries are worth persisting too
+            self.persist_min_ttl = 0
+        else:
+            self._disk = DiskStore(self.disk_cache_dir)
+            self.persist_min_ttl = 300
+        self.lease_ttl = lease_ttl
         
-        # Load disk cache into memory on startup
-        self._load_disk_cache()
+        # Background sweeper: purges expired entries, compacts disk hourly
+        self.sweep_interval = sweep_interval
+        self._stop_sweeper = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
     
-    def _load_disk_cache(self):
-        """Load disk cache into memory on startup"""
-        try:
-            cache_file = self.disk_cache_dir / "cache.json"
-            if cache_file.exists():
-                with open(cache_file, 'r') as f:
-                    disk_data = json.load(f)
-                    current_time = time.time()
-                    # Only load non-expired entries
-                    for key, (value, expiry) in disk_data.items():
-                        if current_time < expiry:
-                            self._memory_cache[key] = (value, expiry)
-                print(f"Loaded {len(self._memory_cache)} cached entries from disk")
-        except Exception as e:
-            print(f"Could not load disk cache: {e}")
-    
-    def _save_to_disk(self):
-        """Persist memory cache to disk"""
-        try:
-            cache_file = self.disk_cache_dir / "cache.json"
-            # Only save non-expired entries
-            current_time = time.time()
-            valid_entries = {
-                k: v for k, v in self._memory_cache.items() 
-                if v[1] > current_time
-            }
-            with open(cache_file, 'w') as f:
-                json.dump(valid_entries, f)
-        except Exception as e:
-            print(f"Could not save to disk cache: {e}")
+    def _sweep_loop(self):
+        """Periodically drop expired entries from memory and disk"""
+        self._compact_disk_cache()
+        last_compaction = time.time()
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            try:
+                self.purge_expired()
+                if time.time() - last_compaction >= 3600:
+                    self._compact_disk_cache()
+                    last_compaction = time.time()
+            except Exception as e:
+                print(f"Cache sweep failed: {e}")
+    
+    def _compact_disk_cache(self):
+        """Remove expired and abandoned entries from the disk cache"""
+        removed = self._disk.compact()
+        if removed:
+            print(f"Compacted disk cache: removed {removed} stale files")
+    
+    def stop(self):
+        """Stop the background sweeper"""
+        self._stop_sweeper.set()
+    
+    def _remove(self, key: str) -> Optional[_CacheEntry]:
+        """Remove an entry from memory and keep byte accounting in sync (lock held)"""
+        entry = self._memory_cache.pop(key, None)
+        if entry is not None:
+            self._forget(key, entry)
+        return entry
+    
+    def _forget(self, key: str, entry: _CacheEntry):
+        """Drop a removed entry from byte accounting and the tag index (lock held)"""
+        self._memory_bytes -= entry.size
+        cache_metrics.add_bytes(key, -entry.size)
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+    
+    def _store(self, key: str, value: Any, expiry: float, stale_at: float, tags: FrozenSet[str] = frozenset()):
+        """Insert into memory as most recently used, then enforce budgets (lock held)"""
+        self._remove(key)
+        entry = _CacheEntry(value, expiry, stale_at, estimate_size(value), tags)
+        self._memory_cache[key] = entry
+        self._memory_bytes += entry.size
+        cache_metrics.add_bytes(key, entry.size)
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+        self._evict()
+    
+    def _evict(self):
+        """Evict least recently used entries until within budget (lock held)"""
+        while self._memory_cache and (
+            len(self._memory_cache) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            # Never evict the entry that was just inserted
+            if len(self._memory_cache) == 1:
+                break
+            key, entry = self._memory_cache.popitem(last=False)
+            self._forget(key, entry)
+            cache_metrics.incr(key, "evictions")
+            self._evictions += 1
+            self._evicted_bytes += entry.size
     
     def get(self, key: str) -> Optional[Any]:
-        """Get value from cache (memory first, then disk)"""
-        if key in self._memory_cache:
-            value, expiry = self._memory_cache[key]
-            if time.time() < expiry:
-                return value
-            else:
+        """Get value from cache (memory first, then disk); stale values are returned too"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+    
+    def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Get value from cache along with its freshness
+        
+        Returns:
+            (value, is_stale) or None if missing or past its hard expiry
+        """
+        with self._lock:
+            entry = self._memory_cache.get(key)
+            if entry is not None:
+                now = time.time()
+                if now < entry.expiry:
+                    self._memory_cache.move_to_end(key)
+                    is_stale = now >= entry.stale_at
+                    cache_metrics.incr(key, "stale_hits" if is_stale else "hits")
+                    return entry.value, is_stale
                 # Expired, remove from cache
-                del self._memory_cache[key]
+                self._remove(key)
+                self._expirations += 1
+                cache_metrics.incr(key, "expirations")
+                cache_metrics.incr(key, "misses")
+                return None
+        
+        # Lazily promote a persisted entry into memory on first access
+        disk_entry = self._disk.get(key)
+        if disk_entry is not None:
+            value, expiry, stale_at, tags = disk_entry
+            with self._lock:
+                self._store(key, value, expiry, stale_at, tags)
+            is_stale = time.time() >= stale_at
+            cache_metrics.incr(key, "stale_hits" if is_stale else "hits")
+            return value, is_stale
+        cache_metrics.incr(key, "misses")
         return None
     
-    def set(self, key: str, value: Any, ttl: int = 300, persist: bool = True):
+    def has(self, key: str) -> bool:
+        """
+        Whether key holds a value (fresh or stale), without counting a hit or miss
+
+        A persisted entry is promoted into memory, so the get that usually
+        follows is served from memory.
+        """
+        with self._lock:
+            entry = self._memory_cache.get(key)
+            if entry is not None and time.time() < entry.expiry:
+                return True
+        disk_entry = self._disk.get(key)
+        if disk_entry is None:
+            return False
+        value, expiry, stale_at, tags = disk_entry
+        with self._lock:
+            self._store(key, value, expiry, stale_at, tags)
+        return True
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Union[int, TTLPolicy] = 300,
+        persist: bool = True,
+        hard_ttl: Union[int, TTLPolicy, None] = None,
+        tags: Optional[Iterable[str]] = None,
+    ):
         """
-        Set value in cache with TTL (seconds)
+        Set value in cache with TTL (seconds or a TTLPolicy)
         
         Args:
             key: Cache key
             value: Value to cache
-            ttl: Time to live in seconds
+            ttl: Time to live in seconds (soft TTL when hard_ttl is given)
             persist: Whether to persist to disk (default True for long TTL)
+            hard_ttl: Optional hard TTL; between ttl and hard_ttl the value is served as stale
+            tags: What the value was derived from (see symbol_tag/table_tag/portfolio_tag),
+                for invalidate_tags()
         """
-        expiry = time.time() + ttl
-        self._memory_cache[key] = (value, expiry)
+        ttl = resolve_ttl(ttl)
+        hard_ttl = resolve_ttl(hard_ttl)
+        now = time.time()
+        stale_at = now + ttl
+        lifetime = max(ttl, hard_ttl or 0)
+        expiry = now + lifetime
+        tags = frozenset(tags or ())
+        with self._lock:
+            self._store(key, value, expiry, stale_at, tags)
+        cache_metrics.incr(key, "sets")
         
-        # Persist to disk for long-lived cache entries
-        if persist and ttl > 300:  # Only persist if TTL > 5 minutes
-            self._save_to_disk()
+        # Persist to disk for long-lived cache entries (any entry with the shared backend)
+        if persist and lifetime > self.persist_min_ttl:
+            self._disk.set(key, value, expiry, stale_at, tags)
+    
+    def will_persist(self, ttl: Union[int, TTLPolicy] = 300, hard_ttl: Union[int, TTLPolicy, None] = None) -> bool:
+        """Whether set(..., persist=True) with these TTLs (as of now) writes to the persistent layer"""
+        return max(resolve_ttl(ttl), resolve_ttl(hard_ttl) or 0) > self.persist_min_ttl
+    
+    def load_persisted(self, key: str, newer_than: float) -> Optional[Any]:
+        """
+        Read key from the persistent layer if it is fresh beyond `newer_than`
+        (its stale_at is later), promoting it into memory. Used to pick up
+        values another worker computed.
+        """
+        disk_entry = self._disk.get(key)
+        if disk_entry is None:
+            return None
+        value, expiry, stale_at, tags = disk_entry
+        if stale_at <= newer_than:
+            return None
+        with self._lock:
+            self._store(key, value, expiry, stale_at, tags)
+        return value
+    
+    def get_persisted(self, key: str) -> Optional[Any]:
+        """Read key from the persistent layer only (what other workers see)"""
+        disk_entry = self._disk.get(key)
+        return disk_entry[0] if disk_entry is not None else None
+    
+    def persisted_stale_at(self, key: str) -> float:
+        """stale_at of the persisted entry for key, or 0 if none"""
+        disk_entry = self._disk.get(key)
+        return disk_entry[2] if disk_entry is not None else 0.0
+    
+    def try_lease(self, key: str) -> bool:
+        """Take the cross-process compute lease for key"""
+        return self._disk.try_lease(key, self.lease_ttl)
+    
+    def lease_held(self, key: str) -> bool:
+        return self._disk.lease_held(key)
+    
+    def release_lease(self, key: str):
+        self._disk.release_lease(key)
     
     def delete(self, key: str):
         """Delete key from cache"""
-        if key in self._memory_cache:
-            del self._memory_cache[key]
-            self._save_to_disk()
+        with self._lock:
+            self._remove(key)
+        self._disk.delete(key)
+    
+    def invalidate_tags(self, tags: Iterable[str], persisted: bool = True) -> int:
+        """
+        Evict every entry carrying any of the tags
+        
+        Args:
+            tags: Tags to invalidate, e.g. [symbol_tag("NVDA"), table_tag("OBQ_Scores")]
+            persisted: Also remove matching entries from disk. Workers sharing
+                the disk tier only need to drop their own memory entries once
+                one of them has cleared the disk.
+            
+        Returns:
+            Number of distinct entries removed
+        """
+        tags = set(tags)
+        with self._lock:
+            keys = set().union(*(self._tag_index.get(tag, ()) for tag in tags)) if tags else set()
+            for key in keys:
+                self._remove(key)
+        if persisted and tags:
+            keys |= self._disk.delete_tagged(tags)
+        for key in keys:
+            cache_metrics.incr(key, "invalidations")
+        removed = len(keys)
+        if removed:
+            print(f"Cache invalidated {removed} entries for tags: {', '.join(sorted(tags))}")
+        return removed
     
     def clear(self):
         """Clear all cache"""
-        self._memory_cache.clear()
-        try:
-            cache_file = self.disk_cache_dir / "cache.json"
-            if cache_file.exists():
-                cache_file.unlink()
-        except Exception as e:
-            print(f"Could not clear disk cache: {e}")
+        with self._lock:
+            self._memory_cache.clear()
+            self._tag_index.clear()
+            self._memory_bytes = 0
+        cache_metrics.reset_bytes()
+        self._disk.clear()
+    
+    def purge_expired(self) -> int:
+        """Remove expired entries from memory, returns number removed"""
+        current_time = time.time()
+        with self._lock:
+            expired_keys = [k for k, e in self._memory_cache.items() if current_time >= e.expiry]
+            for key in expired_keys:
+                self._remove(key)
+                cache_metrics.incr(key, "expirations")
+            self._expirations += len(expired_keys)
+        return len(expired_keys)
     
     def size(self) -> int:
         """Get cache size"""
         # Remove expired entries first
-        current_time = time.time()
-        expired_keys = [k for k, (_, exp) in self._memory_cache.items() if current_time >= exp]
-        for key in expired_keys:
-            del self._memory_cache[key]
+        self.purge_expired()
         return len(self._memory_cache)
     
     def get_stats(self) -> dict:
         """Get cache statistics"""
         current_time = time.time()
-        total_entries = len(self._memory_cache)
-        expired = sum(1 for _, (_, exp) in self._memory_cache.items() if current_time >= exp)
+        with self._lock:
+            total_entries = len(self._memory_cache)
+            expired = sum(1 for e in self._memory_cache.values() if current_time >= e.expiry)
+            stale = sum(1 for e in self._memory_cache.values() if e.stale_at <= current_time < e.expiry)
+            memory_bytes = self._memory_bytes
         valid = total_entries - expired
         
         return {
             "total_entries": total_entries,
             "valid_entries": valid,
+            "stale_entries": stale,
             "expired_entries": expired,
+            "memory_bytes": memory_bytes,
+            "tags": len(self._tag_index),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self._evictions,
+            "evicted_bytes": self._evicted_bytes,
+            "expirations": self._expirations,
+            "disk_entries": self._disk.count(),
+            "disk_backend": self.backend,
             "disk_cache_dir": str(self.disk_cache_dir),
+            "in_flight": single_flight.in_flight(),
+            "by_prefix": cache_metrics.snapshot(),
             "last_updated": datetime.now().isoformat()
         }
+    
+    def render_prometheus(self) -> str:
+        """Cache metrics in the Prometheus text format"""
+        stats = self.get_stats()
+        return cache_metrics.render_prometheus(gauges={
+            "entries": stats["total_entries"],
+            "stale_entries": stats["stale_entries"],
+            "used_bytes": stats["memory_bytes"],
+            "max_bytes": stats["max_bytes"],
+            "disk_entries": stats["disk_entries"],
+            "in_flight": stats["in_flight"],
+        })
 
 # Global cache instance
-cache = EnhancedCache()
+cache = EnhancedCache(
+    disk_cache_dir=settings.CACHE_DIR,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    sweep_interval=settings.CACHE_SWEEP_INTERVAL,
+    backend=settings.CACHE_BACKEND,
+    lease_ttl=settings.CACHE_LEASE_TTL,
+)
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key
+    
+    The first caller starts the computation as a task; everyone else arriving
+    while it runs awaits that same task. Results and exceptions are delivered
+    to every waiter, and the key is released as soon as the task finishes, so
+    failures are never remembered. A waiter being cancelled does not cancel
+    the shared computation.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+    
+    def start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the running task for key, starting one if none is in flight"""
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._release(k, t))
+        return task
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory once per key and await the shared result"""
+        return await asyncio.shield(self.start(key, factory))
+    
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+    
+    def in_flight(self) -> int:
+        """Number of computations currently running"""
+        return len(self._inflight)
 
-def cached(ttl: int = 300, key_prefix: str = "", persist: bool = True):
+# Global in-flight registry used by @cached
+single_flight = SingleFlight()
+
+# Argument strings longer than this are replaced by their hash in cache keys
+MAX_KEY_ARGS_LENGTH = 128
+
+# Signatures are resolved once per function, not on every call
+_signature = lru_cache(maxsize=None)(inspect.signature)
+
+def _normalize_key_arg(value: Any) -> Any:
+    """Convert a call argument into a JSON-stable, process-independent form"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return _normalize_key_arg(value.value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): _normalize_key_arg(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_key_arg(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize_key_arg(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    # numpy scalars
+    if hasattr(value, "dtype") and hasattr(value, "item"):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    # pydantic models
+    if hasattr(value, "model_dump"):
+        return _normalize_key_arg(value.model_dump(mode="json"))
+    # Objects without a meaningful repr only contribute their type, never an address
+    if type(value).__repr__ is object.__repr__:
+        return f"<{type(value).__module__}.{type(value).__qualname__}>"
+    return repr(value)
+
+def make_cache_key(func: Callable, args: tuple, kwargs: dict, key_prefix: str = "", version: int = 1) -> str:
+    """
+    Build a canonical cache key for a function call
+    
+    Positional and keyword arguments are bound to the function signature with
+    defaults applied, so f(1), f(x=1) and f(1, y=<default>) share a key.
+    ``self``/``cls`` are skipped, so keys are identical across instances,
+    processes and restarts. Long argument lists are hashed. Bump ``version``
+    whenever the cached function's output format changes.
+    """
+    try:
+        bound = _signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        call_args = {name: val for name, val in bound.arguments.items() if name not in ("self", "cls")}
+    except TypeError:
+        call_args = {"args": list(args), "kwargs": kwargs}
+    
+    args_str = json.dumps(_normalize_key_arg(call_args), sort_keys=True, separators=(",", ":"), default=str)
+    if len(args_str) > MAX_KEY_ARGS_LENGTH:
+        args_str = "sha256=" + hashlib.sha256(args_str.encode("utf-8")).hexdigest()
+    return f"{key_prefix}:{func.__qualname__}:v{version}:{args_str}"
+
+# How often a worker waiting on another worker's lease polls for the result
+LEASE_POLL_INTERVAL = 0.1
+
+async def compute_across_processes(cache_key: str, compute: Callable[[], Awaitable[Any]], force: bool = False) -> Any:
+    """
+    Cross-process single flight: at most one worker computes cache_key
+    
+    Before computing, pick up a value another worker already stored. Otherwise
+    take the lease and compute, or, if a peer holds it, poll the persistent
+    layer until its result lands. If the peer dies (lease expires) or never
+    stores a value, compute locally.
+    
+    Args:
+        force: Recompute even if a fresh value is persisted (refresh ahead of
+            expiry); only a value newer than the current one is accepted from peers
+    """
+    newer_than = time.time()
+    if force:
+        newer_than = max(newer_than, cache.persisted_stale_at(cache_key))
+    else:
+        value = cache.load_persisted(cache_key, newer_than)
+        if value is not None:
+            return value
+    
+    deadline = time.time() + cache.lease_ttl
+    while True:
+        if cache.try_lease(cache_key):
+            try:
+                return await compute()
+            finally:
+                cache.release_lease(cache_key)
+        await asyncio.sleep(LEASE_POLL_INTERVAL)
+        value = cache.load_persisted(cache_key, newer_than)
+        if value is not None:
+            return value
+        if time.time() >= deadline:
+            return await compute()
+
+async def compute_shared(
+    cache_key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: Union[int, TTLPolicy],
+    hard_ttl: Union[int, TTLPolicy, None] = None,
+    force: bool = False,
+) -> Any:
+    """
+    compute_across_processes for entries the persistent layer will keep
+
+    Peers can only pick up entries that are persisted; for the rest, waiting
+    on another worker's lease would just add latency, so compute directly.
+    """
+    if not cache.will_persist(ttl, hard_ttl):
+        return await compute()
+    return await compute_across_processes(cache_key, compute, force=force)
+
+def _log_refresh_failure(key: str):
+    """Done-callback for background refreshes, which have no caller to raise to"""
+    def callback(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background refresh failed for {key[:100]}: {task.exception()}")
+    return callback
+
+def cached(
+    ttl: Union[int, TTLPolicy] = 300,
+    key_prefix: str = "",
+    persist: bool = True,
+    hard_ttl: Union[int, TTLPolicy, None] = None,
+    version: int = 1,
+    tags: Union[Iterable[str], Callable[..., Iterable[str]], None] = None,
+    degraded: Optional[Callable[..., bool]] = None,
+    degraded_ttl: Union[int, TTLPolicy, None] = None,
+):
     """
     Decorator for caching function results
     
     Args:
-        ttl: Time to live in seconds
-            - 86400 (24h) for MotherDuck fundamentals
-            - 300 (5min) for yfinance prices
-            - 600 (10min) for portfolio summaries
+        ttl: Time to live in seconds, or a TTLPolicy evaluated on every write
+            - FUNDAMENTALS_TTL: until the nightly MotherDuck load
+            - PRICE_TTL: 5min during the session, until next open otherwise
+            - SUMMARY_TTL: 2min during the session, at most 1h while closed
         key_prefix: Prefix for cache key
         persist: Whether to persist to disk (auto-enabled for TTL > 5min)
+        hard_ttl: Enables stale-while-revalidate. After ttl the cached value is
+            still returned immediately while one background task refreshes it;
+            only after hard_ttl does a caller wait for a fresh value.
+        version: Key namespace version; bump it when the function's output changes
+            so entries persisted by older code are never read back
+        tags: Tags stored with every result, or a callable receiving the call's
+            arguments and returning them (e.g. the portfolio's symbols)
+        degraded: Callable receiving the result and the call's arguments; True
+            when the result was built around a failed upstream (e.g. a summary
+            without prices). Such results are kept in memory for degraded_ttl
+            only (not at all if it is None), never served stale, and never
+            replace a value that is still cached.
+        degraded_ttl: Lifetime of a degraded result
     """
     def decorator(func):
+        def store(cache_key: str, result: Any, args: tuple, kwargs: dict):
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            if degraded is not None and degraded(result, *args, **kwargs):
+                cache_metrics.incr(cache_key, "degraded")
+                # A stale but complete value (still within hard_ttl) beats a fresh degraded one
+                if degraded_ttl is not None and not cache.has(cache_key):
+                    print(f"Cache DEGRADED: {cache_key[:100]} (kept {resolve_ttl(degraded_ttl)}s)")
+                    cache.set(cache_key, result, degraded_ttl, persist=False, tags=entry_tags)
+                return
+            cache.set(cache_key, result, ttl, persist=persist, hard_ttl=hard_ttl, tags=entry_tags)
+        
+        def make_compute(cache_key: str, args: tuple, kwargs: dict, force: bool = False):
+            async def compute():
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    cache_metrics.incr(cache_key, "errors")
+                    raise
+                finally:
+                    cache_metrics.observe_latency(cache_key, time.perf_counter() - started)
+                store(cache_key, result, args, kwargs)
+                return result
+            
+            if not persist:
+                return compute
+            
+            return lambda: compute_shared(cache_key, compute, ttl, hard_ttl, force=force)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Generate cache key
-            cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
+            cache_key = make_cache_key(func, args, kwargs, key_prefix, version)
+            compute = make_compute(cache_key, args, kwargs)
             
             # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                print(f"Cache HIT: {cache_key[:100]}")
+            entry = cache.get_entry(cache_key)
+            if entry is not None:
+                cached_value, is_stale = entry
+                if is_stale:
+                    # Serve stale value now, refresh once in the background
+                    print(f"Cache STALE: {cache_key[:100]}")
+                    refresh = single_flight.start(cache_key, compute)
+                    refresh.add_done_callback(_log_refresh_failure(cache_key))
+                else:
+                    print(f"Cache HIT: {cache_key[:100]}")
                 return cached_value
             
-            # Call function and cache result
+            # Call function and cache result; concurrent misses share one call
             print(f"Cache MISS: {cache_key[:100]}")
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, ttl, persist=persist and ttl > 300)
-            return result
+            return await single_flight.run(cache_key, compute)
+        
+        async def refresh(*args, **kwargs):
+            """Recompute and re-cache regardless of the current entry (used by the warmer)"""
+            cache_key = make_cache_key(func, args, kwargs, key_prefix, version)
+            return await single_flight.run(cache_key, make_compute(cache_key, args, kwargs, force=True))
+        
+        def store_result(result: Any, *args, **kwargs):
+            """Cache a result built outside the wrapper exactly as a call with these arguments would"""
+            store(make_cache_key(func, args, kwargs, key_prefix, version), result, args, kwargs)
         
+        wrapper.cache_key = lambda *args, **kwargs: make_cache_key(func, args, kwargs, key_prefix, version)
+        wrapper.refresh = refresh
+        wrapper.store = store_result
         return wrapper
     return decorator
@@ -0,0 +1,151 @@
+"""
+Bounded thread pool for blocking I/O called from async code
+
+yfinance and the DuckDB/MotherDuck client are blocking libraries. Calling
+them directly inside an ``async def`` stalls the event loop for every other
+request, so they are run on a shared thread pool instead. A per-host limit
+keeps one upstream (e.g. Yahoo, which rate-limits aggressively) from taking
+every worker thread or tripping throttling, and a per-host timeout bounds how
+long a request waits on it.
+
+DuckDB/MotherDuck queries get their own small pool (duckdb_executor): each of
+its threads holds one cursor on the shared connection, so the pool size is
+the number of queries that can run at once and slow queries never take the
+threads Yahoo calls need.
+"""
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Logical upstream hosts used as concurrency-limit keys
+YAHOO_HOST = "yahoo"
+MOTHERDUCK_HOST = "motherduck"
+PRICE_STORE_HOST = "price_store"  # local Parquet reads: own limit, no upstream timeout
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a concurrency limit per upstream host
+
+    Args:
+        max_workers: Total threads shared by all hosts
+        per_host_limit: Default number of concurrent calls to one host
+        host_limits: Overrides of per_host_limit for specific hosts
+        timeouts: Seconds a call to a host may take before the caller gets
+            asyncio.TimeoutError (None or missing = no timeout). The thread
+            itself cannot be interrupted, so its host slot is only released
+            once the call really returns.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 32,
+        per_host_limit: int = 8,
+        host_limits: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        thread_name_prefix: str = "io",
+    ):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.host_limits = dict(host_limits or {})
+        self.timeouts = dict(timeouts or {})
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        # asyncio semaphores belong to one event loop, so keep a set per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._timed_out: Dict[str, int] = {}
+
+    def limit_for(self, host: str) -> int:
+        return self.host_limits.get(host, self.per_host_limit)
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(host)
+            if semaphore is None:
+                semaphore = semaphores[host] = asyncio.Semaphore(self.limit_for(host))
+            return semaphore
+
+    async def run(self, host: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking call on the pool, at most limit_for(host) at a time per host
+
+        Raises:
+            asyncio.TimeoutError: The call took longer than the host's timeout
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(host)
+        await semaphore.acquire()
+        with self._lock:
+            self._active[host] = self._active.get(host, 0) + 1
+
+        def release(_future):
+            with self._lock:
+                self._active[host] -= 1
+            loop.call_soon_threadsafe(semaphore.release)
+
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            release(None)
+            raise
+        # Released when the thread finishes (or the call is cancelled before it starts)
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeouts.get(host))
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out[host] = self._timed_out.get(host, 0) + 1
+            print(f"{host} call {getattr(func, '__name__', func)} timed out after {self.timeouts.get(host)}s")
+            raise
+
+    async def map(self, host: str, func: Callable[[Any], T], items: Iterable[Any]) -> List[T]:
+        """
+        Call func for every item concurrently (bounded by the host limit)
+
+        Returns:
+            Results in the order of items; the first exception is raised
+        """
+        return list(await asyncio.gather(*(self.run(host, func, item) for item in items)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = {host: count for host, count in self._active.items() if count}
+            timed_out = dict(self._timed_out)
+        return {
+            "max_workers": self.max_workers,
+            "per_host_limit": self.per_host_limit,
+            "timeouts": self.timeouts,
+            "active": active,
+            "timed_out": timed_out,
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+# Global executor for blocking upstream calls (yfinance, local price store)
+io_executor = BoundedExecutor(
+    max_workers=settings.IO_MAX_WORKERS,
+    per_host_limit=settings.IO_PER_HOST_LIMIT,
+    timeouts={YAHOO_HOST: settings.YAHOO_TIMEOUT},
+)
+
+# Dedicated pool for DuckDB/MotherDuck queries, one cursor per thread
+duckdb_executor = BoundedExecutor(
+    max_workers=settings.MOTHERDUCK_MAX_CONCURRENCY,
+    per_host_limit=settings.MOTHERDUCK_MAX_CONCURRENCY,
+    timeouts={MOTHERDUCK_HOST: settings.MOTHERDUCK_TIMEOUT},
+    thread_name_prefix="duckdb",
+)
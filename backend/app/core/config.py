@@ -24,9 +24,61 @@ class Settings(BaseSettings):
     
     # Cache settings
     CACHE_TTL: int = 300  # 5 minutes
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "/tmp/jcn_cache")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+    CACHE_SWEEP_INTERVAL: int = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # seconds
+    # "files" (one file per key) or "sqlite" (WAL database shared by all workers on the host)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "files")
+    CACHE_LEASE_TTL: int = 60  # seconds a worker may hold a cross-process compute lease
+    
+    # Market-calendar-aware TTLs (see app/core/ttl_policy.py)
+    MARKET_TIMEZONE: str = "America/New_York"
+    PRICE_TTL_OPEN: int = 300  # 5 minutes during the session, until next open otherwise
+    SUMMARY_TTL_OPEN: int = 120  # fresh window for portfolio summaries during the session
+    SUMMARY_HARD_TTL_OPEN: int = 3600  # summaries may be served stale (while refreshing) up to this
+    SUMMARY_TTL_CLOSED: int = 3600  # cap while the market is closed, so a bad summary never lasts a weekend
+    SUMMARY_HARD_TTL_CLOSED: int = 4 * 3600
+    DEGRADED_SUMMARY_TTL: int = 60  # summaries missing prices, fundamentals or history (memory only)
+    FUNDAMENTALS_REFRESH_TIME: str = os.getenv("FUNDAMENTALS_REFRESH_TIME", "06:00")  # ET, after nightly OBQ/GuruFocus load
+    REFERENCE_REFRESH_TIME: str = os.getenv("REFERENCE_REFRESH_TIME", "05:00")  # ET, daily re-read of Yahoo name/sector/industry
+    FUNDAMENTALS_MAX_TTL: int = 7 * 24 * 3600  # backstop while the watermark poller evicts on new loads
+    
+    # Data watermark poller (evicts cache entries derived from a table when new data lands)
+    WATERMARK_POLL_ENABLED: bool = os.getenv("WATERMARK_POLL_ENABLED", "True").lower() == "true"
+    WATERMARK_POLL_INTERVAL: int = int(os.getenv("WATERMARK_POLL_INTERVAL", "300"))  # seconds
+    
+    # Cache warmer (precomputes portfolio summaries at startup and ahead of expiry)
+    CACHE_WARMER_ENABLED: bool = os.getenv("CACHE_WARMER_ENABLED", "True").lower() == "true"
+    CACHE_WARMER_CONCURRENCY: int = int(os.getenv("CACHE_WARMER_CONCURRENCY", "2"))
+    CACHE_WARMER_LEAD_TIME: int = 30  # seconds before the fresh window ends
+    CACHE_WARMER_MIN_INTERVAL: int = 60  # seconds between runs at most this often
+    
+    # Risk metrics
+    RISK_FREE_RATE: float = float(os.getenv("RISK_FREE_RATE", "0.0"))  # annual, as a fraction (0.04 = 4%)
+    
+    # Blocking upstream calls (yfinance, MotherDuck) run on a bounded thread pool
+    IO_MAX_WORKERS: int = int(os.getenv("IO_MAX_WORKERS", "32"))
+    IO_PER_HOST_LIMIT: int = int(os.getenv("IO_PER_HOST_LIMIT", "8"))  # concurrent calls to one upstream
+    YAHOO_TIMEOUT: float = float(os.getenv("YAHOO_TIMEOUT", "20"))  # seconds per yfinance call
+    
+    # Async HTTP quote provider (Yahoo chart API); falls back to yfinance on failure
+    YAHOO_HTTP_ENABLED: bool = os.getenv("YAHOO_HTTP_ENABLED", "True").lower() == "true"
+    YAHOO_HTTP_TIMEOUT: float = float(os.getenv("YAHOO_HTTP_TIMEOUT", "10"))  # seconds per request
+    
+    # Live quote push (/ws/portfolios/{id})
+    QUOTE_FEED: str = os.getenv("QUOTE_FEED", "yahoo")  # "yahoo", or "fake" for offline load tests
+    QUOTE_POLL_INTERVAL: float = float(os.getenv("QUOTE_POLL_INTERVAL", "5"))  # seconds between quote polls
+    WS_SEND_QUEUE: int = int(os.getenv("WS_SEND_QUEUE", "16"))  # messages buffered per client before it is resynced
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "10"))  # seconds a send may block before the client is dropped
+
+    # Event loop lag monitor
+    LOOP_LAG_INTERVAL: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))  # seconds between probes
     
     # MotherDuck settings
     MOTHERDUCK_TOKEN: str = os.getenv("MOTHERDUCK_TOKEN", "")
+    MOTHERDUCK_MAX_CONCURRENCY: int = int(os.getenv("MOTHERDUCK_MAX_CONCURRENCY", "4"))  # DuckDB pool threads and motherduck_pool slots (also read directly by the pool)
+    MOTHERDUCK_TIMEOUT: float = float(os.getenv("MOTHERDUCK_TIMEOUT", "30"))  # seconds per query
     
     # Stock data settings
     PERSISTENT_VALUE_STOCKS: List[str] = [
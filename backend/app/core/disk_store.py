@@ -0,0 +1,253 @@
+"""
+Per-key disk store for the enhanced cache
+
+Every cache key lives in its own file, so a write costs O(value size)
+instead of re-serializing the whole cache. Files are written to a temp
+name and atomically renamed into place, and entries are only read back
+(lazily) when a key is first requested after a restart. Lease files
+created with O_EXCL provide cross-process single-flight locking.
+
+File layout:
+    <root>/entries/<hash[:2]>/<hash>.entry
+    <root>/leases/<hash>.lease
+
+    line 1: JSON header {"key": ..., "expiry": ..., "stale_at": ..., "codec": ..., "tags": [...]}
+    rest:   value encoded by the named serializer (see serializers.py)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, FrozenSet, Iterable, Optional, Set, Tuple
+from app.core.serializers import serializers
+
+ENTRY_SUFFIX = ".entry"
+TMP_SUFFIX = ".tmp"
+
+
+class DiskStore:
+    """One-file-per-key persistent store with atomic writes"""
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+        self.entries_dir = self.root_dir / "entries"
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.leases_dir = self.root_dir / "leases"
+        self.leases_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        """Map a cache key to its entry file"""
+        digest = self._digest(key)
+        return self.entries_dir / digest[:2] / f"{digest}{ENTRY_SUFFIX}"
+
+    def _lease_path(self, key: str) -> Path:
+        return self.leases_dir / f"{self._digest(key)}.lease"
+
+    @property
+    def owner(self) -> str:
+        return f"{os.getpid()}:{id(self)}"
+
+    @staticmethod
+    def _read_header(f) -> Optional[dict]:
+        """Read the JSON header line of an entry file"""
+        line = f.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float, FrozenSet[str]]]:
+        """
+        Load a single entry from disk
+
+        Returns:
+            (value, expiry, stale_at, tags) or None if missing, expired or unreadable
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                header = self._read_header(f)
+                if header is None or header.get("key") != key:
+                    return None
+                expiry = header["expiry"]
+                if time.time() >= expiry:
+                    self._unlink(path)
+                    return None
+                # Entries written before codecs were recorded are pickles
+                value = serializers.get(header.get("codec", "pickle")).loads(f.read())
+            return value, expiry, header.get("stale_at", expiry), frozenset(header.get("tags", ()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Could not read disk cache entry {key[:100]}: {e}")
+            self._unlink(path)
+            return None
+
+    def set(self, key: str, value: Any, expiry: float, stale_at: Optional[float] = None, tags: Iterable[str] = ()):
+        """Write a single entry to disk (temp file + atomic rename)"""
+        path = self._path_for(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}{TMP_SUFFIX}")
+        try:
+            codec, payload = serializers.dumps(value)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            header = json.dumps({
+                "key": key,
+                "expiry": expiry,
+                "stale_at": stale_at if stale_at is not None else expiry,
+                "codec": codec,
+                "tags": sorted(tags),
+            }).encode("utf-8")
+            with open(tmp_path, "wb") as f:
+                f.write(header + b"\n")
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Could not save to disk cache: {e}")
+            self._unlink(tmp_path)
+
+    def delete(self, key: str):
+        """Remove a single entry from disk"""
+        self._unlink(self._path_for(key))
+
+    def delete_tagged(self, tags: Iterable[str]) -> Set[str]:
+        """
+        Remove every entry carrying any of the tags (header-only scan)
+
+        Returns:
+            Keys removed
+        """
+        tags = set(tags)
+        removed = set()
+        for path in self.entries_dir.glob(f"*/*{ENTRY_SUFFIX}"):
+            try:
+                with open(path, "rb") as f:
+                    header = self._read_header(f)
+                if header is not None and tags.intersection(header.get("tags", ())):
+                    self._unlink(path)
+                    removed.add(header["key"])
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Removing unreadable disk cache file {path.name}: {e}")
+                self._unlink(path)
+        return removed
+
+    def clear(self):
+        """Remove every entry from disk"""
+        try:
+            shutil.rmtree(self.entries_dir, ignore_errors=True)
+            self.entries_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            print(f"Could not clear disk cache: {e}")
+
+    def compact(self, tmp_max_age: int = 3600) -> int:
+        """
+        Drop expired entries and abandoned temp files
+
+        Only the header line of each file is read, values are never
+        deserialized.
+
+        Args:
+            tmp_max_age: Age in seconds after which a temp file is considered abandoned
+
+        Returns:
+            Number of files removed
+        """
+        removed = 0
+        now = time.time()
+
+        # Single-file cache from earlier versions is never read again
+        legacy_file = self.root_dir / "cache.json"
+        if legacy_file.exists():
+            self._unlink(legacy_file)
+            removed += 1
+
+        for path in self.entries_dir.glob("*/*"):
+            try:
+                if path.name.endswith(TMP_SUFFIX):
+                    if now - path.stat().st_mtime > tmp_max_age:
+                        self._unlink(path)
+                        removed += 1
+                    continue
+                with open(path, "rb") as f:
+                    header = self._read_header(f)
+                if header is None or now >= header["expiry"]:
+                    self._unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Removing unreadable disk cache file {path.name}: {e}")
+                self._unlink(path)
+                removed += 1
+
+        for path in self.leases_dir.glob("*.lease"):
+            _, expires_at = self._read_lease(path)
+            if expires_at is not None and expires_at <= now:
+                self._unlink(path)
+        return removed
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        """Take the cross-process compute lease for key unless another live owner holds it"""
+        path = self._lease_path(key)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                owner, expires_at = self._read_lease(path)
+                if owner == self.owner:
+                    return True
+                if expires_at is not None and expires_at > time.time():
+                    return False
+                # Abandoned lease (crashed worker): break it and retry once
+                self._unlink(path)
+                continue
+            except Exception as e:
+                print(f"Could not take disk cache lease: {e}")
+                return True
+            with os.fdopen(fd, "w") as f:
+                json.dump({"owner": self.owner, "expires_at": time.time() + ttl}, f)
+            return True
+        return False
+
+    def lease_held(self, key: str) -> bool:
+        """Whether some process currently holds a live lease for key"""
+        _, expires_at = self._read_lease(self._lease_path(key))
+        return expires_at is not None and expires_at > time.time()
+
+    def release_lease(self, key: str):
+        path = self._lease_path(key)
+        owner, _ = self._read_lease(path)
+        if owner == self.owner:
+            self._unlink(path)
+
+    @staticmethod
+    def _read_lease(path: Path) -> Tuple[Optional[str], Optional[float]]:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            return data.get("owner"), data.get("expires_at")
+        except FileNotFoundError:
+            return None, None
+        except Exception:
+            # Half-written lease file: treat as held for a moment
+            return None, time.time() + 1
+
+    def count(self) -> int:
+        """Number of entry files on disk (including not-yet-compacted expired ones)"""
+        return sum(1 for _ in self.entries_dir.glob(f"*/*{ENTRY_SUFFIX}"))
+
+    @staticmethod
+    def _unlink(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not remove disk cache file {path}: {e}")
@@ -0,0 +1,168 @@
+"""
+Encoded JSON responses with ETags for frequently polled endpoints
+
+A response body is serialized with orjson once per (resource variant,
+version) and kept with its content-hash ETag and compressed copies. A poll
+for an unchanged resource then costs a dict lookup: a matching
+If-None-Match gets a 304 without serializing anything, and a 200 reuses the
+stored (already compressed) bytes.
+
+orjson encodes numpy scalars/arrays, datetimes and NaN (as null) natively,
+so values from pandas/DuckDB need no conversion pass first.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not encode itself"""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes (orjson)"""
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding the client accepts: br, then gzip, else None"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class EncodedBody:
+    """A serialized body, its ETag and lazily compressed variants"""
+
+    __slots__ = ("etag", "identity", "_encoded", "_lock")
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        # Weak: gzip/br/identity representations share it
+        self.etag = f'W/"{hashlib.blake2b(identity, digest_size=16).hexdigest()}"'
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """Body in the given content coding (compressed once, then reused)"""
+        if encoding is None:
+            return self.identity
+        with self._lock:
+            body = self._encoded.get(encoding)
+            if body is None:
+                if encoding == "br":
+                    body = brotli.compress(self.identity, quality=BROTLI_QUALITY)
+                else:
+                    body = gzip.compress(self.identity, compresslevel=GZIP_LEVEL)
+                self._encoded[encoding] = body
+            return body
+
+
+class ResponseCache:
+    """
+    LRU of encoded bodies keyed by resource variant
+
+    Args:
+        max_entries: Variants kept (e.g. portfolio x projection)
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, EncodedBody]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"encoded": 0, "reused": 0, "not_modified": 0}
+
+    def get_or_encode(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> EncodedBody:
+        """
+        Encoded body for key at version, serializing build() only if the version changed
+
+        Args:
+            key: Resource variant (e.g. portfolio id and projection)
+            version: Changes whenever the underlying data does (e.g. last_updated)
+            build: Returns the JSON-able value to encode
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._stats["reused"] += 1
+                return entry[1]
+        body = EncodedBody(dumps(build()))
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["encoded"] += 1
+        return body
+
+    def respond(self, request: Request, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Response:
+        """
+        200 with the (compressed) body, or 304 if the client's copy is current
+
+        Clients are told to revalidate every time (Cache-Control: no-cache),
+        which is what a poll wants: unchanged data costs a header round trip.
+        """
+        body = self.get_or_encode(key, version, build)
+        headers = {"ETag": body.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), body.etag):
+            with self._lock:
+                self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = None
+        if len(body.identity) >= MIN_COMPRESS_SIZE:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(body.encoded(encoding), media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, **self._stats}
+
+# Global cache of encoded API responses
+response_cache = ResponseCache()
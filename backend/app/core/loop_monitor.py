@@ -0,0 +1,90 @@
+"""
+Event loop lag monitor
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. Any blocking call made on the event loop (instead of the I/O pools)
+shows up directly as lag, so this is the number to watch to confirm slow
+MotherDuck or Yahoo calls no longer stall other requests.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+# Upper bounds (seconds) for lag buckets; a healthy loop stays in the first few
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopLagMonitor:
+    """Samples event loop scheduling lag every interval seconds"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._histogram = Histogram(LAG_BUCKETS)
+        self._last: Optional[float] = None
+        self._max = 0.0
+
+    async def start(self):
+        """Start sampling in the background (returns immediately)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever(), name="loop-lag-monitor")
+
+    async def stop(self):
+        """Cancel the sampling loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def record(self, lag: float):
+        """Record one lag sample in seconds"""
+        with self._lock:
+            self._histogram.observe(lag)
+            self._last = lag
+            self._max = max(self._max, lag)
+
+    def status(self) -> Dict[str, Any]:
+        """Lag summary reported in /health"""
+        with self._lock:
+            snapshot = self._histogram.snapshot()
+            return {
+                "running": self._task is not None and not self._task.done(),
+                "interval_seconds": self.interval,
+                "samples": snapshot["count"],
+                "last_seconds": round(self._last, 6) if self._last is not None else None,
+                "avg_seconds": snapshot["avg"],
+                "max_seconds": round(self._max, 6),
+            }
+
+    def render_prometheus(self, namespace: str = "jcn_event_loop") -> str:
+        """Lag histogram in the Prometheus text exposition format"""
+        name = f"{namespace}_lag_seconds"
+        with self._lock:
+            buckets = self._histogram.cumulative()
+            total, count = self._histogram.sum, self._histogram.count
+        lines = [
+            f"# HELP {name} Delay between when a scheduled callback should run and when it ran",
+            f"# TYPE {name} histogram",
+            *(f'{name}_bucket{{le="{le}"}} {cumulative}' for le, cumulative in buckets),
+            f"{name}_sum {total:.6f}",
+            f"{name}_count {count}",
+        ]
+        return "\n".join(lines) + "\n"
+
+# Global monitor for the application event loop
+loop_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL)
@@ -0,0 +1,151 @@
+"""
+Lightweight in-process metrics for the cache layer
+
+Counters and latency histograms are kept per cache key prefix (the part of
+the key before the first ":", e.g. "portfolio" or "motherduck") and can be
+rendered as JSON or in the Prometheus text exposition format.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) for latency buckets, Prometheus style
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+COUNTER_NAMES = ("hits", "misses", "stale_hits", "sets", "evictions", "expirations", "invalidations", "errors", "degraded")
+
+
+def key_prefix(key: str) -> str:
+    """Metrics bucket for a cache key"""
+    return key.split(":", 1)[0] or "default"
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe on its own)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs including +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class CacheMetrics:
+    """Per-prefix cache counters, memory bytes and miss latency histograms"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_NAMES, 0))
+        self._bytes: Dict[str, int] = defaultdict(int)
+        self._latency: Dict[str, Histogram] = {}
+
+    def incr(self, key: str, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[key_prefix(key)][counter] += amount
+
+    def add_bytes(self, key: str, amount: int):
+        with self._lock:
+            self._bytes[key_prefix(key)] += amount
+
+    def observe_latency(self, key: str, seconds: float):
+        """Record how long the underlying call took on a cache miss"""
+        prefix = key_prefix(key)
+        with self._lock:
+            histogram = self._latency.get(prefix)
+            if histogram is None:
+                histogram = self._latency[prefix] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def reset_bytes(self):
+        """Forget memory accounting (after the cache is cleared)"""
+        with self._lock:
+            self._bytes.clear()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._bytes.clear()
+            self._latency.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-prefix counters, hit ratio, bytes and latency histogram"""
+        with self._lock:
+            prefixes = set(self._counters) | set(self._bytes) | set(self._latency)
+            result = {}
+            for prefix in sorted(prefixes):
+                counters = dict(self._counters[prefix]) if prefix in self._counters else dict.fromkeys(COUNTER_NAMES, 0)
+                lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+                histogram = self._latency.get(prefix)
+                result[prefix] = {
+                    **counters,
+                    "hit_ratio": round((counters["hits"] + counters["stale_hits"]) / lookups, 4) if lookups else None,
+                    "memory_bytes": self._bytes.get(prefix, 0),
+                    "miss_latency_seconds": histogram.snapshot() if histogram else None,
+                }
+            return result
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None, namespace: str = "jcn_cache") -> str:
+        """Render metrics in the Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        lines = []
+
+        for counter in COUNTER_NAMES:
+            name = f"{namespace}_{counter}_total"
+            lines.append(f"# HELP {name} Cache {counter.replace('_', ' ')} by key prefix")
+            lines.append(f"# TYPE {name} counter")
+            for prefix, data in snapshot.items():
+                lines.append(f'{name}{{prefix="{prefix}"}} {data[counter]}')
+
+        name = f"{namespace}_memory_bytes"
+        lines.append(f"# HELP {name} Approximate in-memory size by key prefix")
+        lines.append(f"# TYPE {name} gauge")
+        for prefix, data in snapshot.items():
+            lines.append(f'{name}{{prefix="{prefix}"}} {data["memory_bytes"]}')
+
+        name = f"{namespace}_miss_latency_seconds"
+        lines.append(f"# HELP {name} Latency of the cached call on a miss")
+        lines.append(f"# TYPE {name} histogram")
+        with self._lock:
+            histograms = list(self._latency.items())
+            rendered = [(prefix, h.cumulative(), h.sum, h.count) for prefix, h in sorted(histograms)]
+        for prefix, buckets, total, count in rendered:
+            for le, cumulative in buckets:
+                lines.append(f'{name}_bucket{{prefix="{prefix}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{prefix="{prefix}"}} {total:.6f}')
+            lines.append(f'{name}_count{{prefix="{prefix}"}} {count}')
+
+        for gauge, value in (gauges or {}).items():
+            name = f"{namespace}_{gauge}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics instance used by the cache
+cache_metrics = CacheMetrics()
@@ -0,0 +1,136 @@
+"""
+Typed serializers for cache values written to disk
+
+Each value is written with the first registered serializer that accepts
+it, and the serializer name is stored in the entry header so it can be
+read back with the same codec:
+
+- "pydantic": pydantic models as JSON produced by pydantic-core
+- "json":     plain primitives (str/int/float/bool/None, lists and str-keyed dicts)
+- "pickle":   everything else
+"""
+
+import importlib
+import json
+import pickle
+from typing import Any, Dict, List, Tuple
+
+
+class Serializer:
+    """Base serializer: bytes in, bytes out"""
+    name = ""
+
+    def can_handle(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    name = "pickle"
+
+    def can_handle(self, value: Any) -> bool:
+        return True
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JSONSerializer(Serializer):
+    name = "json"
+    max_depth = 32
+
+    def can_handle(self, value: Any) -> bool:
+        return self._is_primitive(value, 0)
+
+    def _is_primitive(self, value: Any, depth: int) -> bool:
+        if depth > self.max_depth:
+            return False
+        if value is None or type(value) in (str, int, float, bool):
+            return True
+        if type(value) is list:
+            return all(self._is_primitive(v, depth + 1) for v in value)
+        if type(value) is dict:
+            return all(type(k) is str and self._is_primitive(v, depth + 1) for k, v in value.items())
+        return False
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class PydanticSerializer(Serializer):
+    """Stores the model class path followed by the model's JSON"""
+    name = "pydantic"
+
+    def can_handle(self, value: Any) -> bool:
+        return hasattr(value, "model_dump_json") and hasattr(type(value), "model_validate_json")
+
+    def dumps(self, value: Any) -> bytes:
+        cls = type(value)
+        class_path = f"{cls.__module__}:{cls.__qualname__}".encode("utf-8")
+        return class_path + b"\n" + value.model_dump_json().encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        class_path, _, payload = data.partition(b"\n")
+        module_name, _, qualname = class_path.decode("utf-8").partition(":")
+        cls = importlib.import_module(module_name)
+        for attr in qualname.split("."):
+            cls = getattr(cls, attr)
+        return cls.model_validate_json(payload)
+
+
+class SerializerRegistry:
+    """Ordered serializer lookup by value type and by stored name"""
+
+    def __init__(self, serializers: List[Serializer]):
+        self._serializers = list(serializers)
+        self._by_name: Dict[str, Serializer] = {s.name: s for s in serializers}
+
+    def register(self, serializer: Serializer, first: bool = True):
+        """Add a serializer, by default ahead of the existing ones"""
+        if first:
+            self._serializers.insert(0, serializer)
+        else:
+            self._serializers.append(serializer)
+        self._by_name[serializer.name] = serializer
+
+    def get(self, name: str) -> Serializer:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise ValueError(f"Unknown cache serializer: {name}")
+
+    def dumps(self, value: Any) -> Tuple[str, bytes]:
+        """
+        Serialize with the first serializer that accepts the value
+
+        A serializer that accepts a value but fails on it (e.g. a model holding
+        numpy scalars) falls through to the next one.
+        """
+        last_error = None
+        for serializer in self._serializers:
+            if not serializer.can_handle(value):
+                continue
+            try:
+                return serializer.name, serializer.dumps(value)
+            except Exception as e:
+                last_error = e
+        raise ValueError(f"No serializer could encode {type(value).__name__}: {last_error}")
+
+
+# Global registry used by the disk store
+serializers = SerializerRegistry([
+    PydanticSerializer(),
+    JSONSerializer(),
+    PickleSerializer(),
+])
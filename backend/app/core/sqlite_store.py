@@ -0,0 +1,201 @@
+"""
+SQLite (WAL) store for the enhanced cache, shared by every worker on a host
+
+Drop-in alternative to DiskStore for multi-worker uvicorn/gunicorn
+deployments: WAL mode lets any number of worker processes read while one
+writes, writes are single-row upserts, and the leases table gives
+cross-process single-flight locking so only one worker computes a missing
+key while the others wait for its result.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, FrozenSet, Iterable, Optional, Set, Tuple
+
+from app.core.serializers import serializers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    expiry REAL NOT NULL,
+    stale_at REAL NOT NULL,
+    codec TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expiry);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS entry_tags_key ON entry_tags (key);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteStore:
+    """Cross-process persistent store backed by a single SQLite database in WAL mode"""
+
+    def __init__(self, root_dir: Path, filename: str = "cache.sqlite3", busy_timeout_ms: int = 5000):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root_dir / filename
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    @property
+    def owner(self) -> str:
+        """Lease owner id (one per process, recomputed after fork)"""
+        return f"{os.getpid()}:{id(self)}"
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float, FrozenSet[str]]]:
+        """
+        Load a single entry
+
+        Returns:
+            (value, expiry, stale_at, tags) or None if missing, expired or unreadable
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT expiry, stale_at, codec, payload FROM entries WHERE key = ? AND expiry > ?",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            expiry, stale_at, codec, payload = row
+            tags = frozenset(tag for (tag,) in conn.execute("SELECT tag FROM entry_tags WHERE key = ?", (key,)))
+            return serializers.get(codec).loads(payload), expiry, stale_at, tags
+        except Exception as e:
+            print(f"Could not read shared cache entry {key[:100]}: {e}")
+            return None
+
+    def set(self, key: str, value: Any, expiry: float, stale_at: Optional[float] = None, tags: Iterable[str] = ()):
+        """Upsert a single entry and replace its tags (one transaction)"""
+        try:
+            codec, payload = serializers.dumps(value)
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT INTO entries (key, expiry, stale_at, codec, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET expiry = excluded.expiry, stale_at = excluded.stale_at, "
+                    "codec = excluded.codec, payload = excluded.payload, updated_at = excluded.updated_at",
+                    (key, expiry, stale_at if stale_at is not None else expiry, codec, sqlite3.Binary(payload), time.time()),
+                )
+                conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+                conn.executemany("INSERT INTO entry_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in set(tags)])
+        except Exception as e:
+            print(f"Could not save to shared cache: {e}")
+
+    def delete(self, key: str):
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"Could not delete shared cache entry: {e}")
+
+    def delete_tagged(self, tags: Iterable[str]) -> Set[str]:
+        """Remove every entry carrying any of the tags; returns the keys removed"""
+        tags = list(set(tags))
+        if not tags:
+            return set()
+        placeholders = ", ".join("?" * len(tags))
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                keys = {key for (key,) in conn.execute(
+                    f"SELECT DISTINCT key FROM entry_tags WHERE tag IN ({placeholders})", tags
+                )}
+                conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+                conn.executemany("DELETE FROM entry_tags WHERE key = ?", [(key,) for key in keys])
+            return keys
+        except Exception as e:
+            print(f"Could not invalidate shared cache tags: {e}")
+            return set()
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_tags")
+            conn.execute("DELETE FROM leases")
+        except Exception as e:
+            print(f"Could not clear shared cache: {e}")
+
+    def compact(self) -> int:
+        """Drop expired entries and leases; returns number of entries removed"""
+        try:
+            now = time.time()
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM entries WHERE expiry <= ?", (now,)).rowcount
+            conn.execute("DELETE FROM entry_tags WHERE key NOT IN (SELECT key FROM entries)")
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            return removed
+        except Exception as e:
+            print(f"Could not compact shared cache: {e}")
+            return 0
+
+    def count(self) -> int:
+        try:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except Exception:
+            return 0
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        """Take the cross-process compute lease for key unless another live owner holds it"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                (key, self.owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+            return row is not None and row[0] == self.owner
+        except Exception as e:
+            # If the lock table is unusable, fall back to computing locally
+            print(f"Could not take shared cache lease: {e}")
+            return True
+
+    def lease_held(self, key: str) -> bool:
+        """Whether some process currently holds a live lease for key"""
+        try:
+            row = self._connect().execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            return row is not None
+        except Exception:
+            return False
+
+    def release_lease(self, key: str):
+        try:
+            self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        except Exception as e:
+            print(f"Could not release shared cache lease: {e}")
@@ -0,0 +1,256 @@
+"""
+TTL policies for the cache
+
+A fixed TTL is wasteful in both directions for market data: after the close
+prices cannot change, yet they are refetched every few minutes, while during
+the session a 10-minute-old summary is already stale. Policies compute the
+TTL at write time from the NYSE calendar instead.
+
+Any place that accepts a TTL in seconds (``cache.set``, ``@cached``) also
+accepts a ``TTLPolicy``.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+MIN_TTL = 30  # never hand out TTLs shorter than this
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    next_month = date(year + (month == 12), month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Weekend holidays move to Friday (Saturday) or Monday (Sunday)"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+class MarketCalendar:
+    """NYSE regular-session calendar (holidays and 1pm early closes)"""
+
+    def __init__(
+        self,
+        timezone: str = "America/New_York",
+        open_time: time = time(9, 30),
+        close_time: time = time(16, 0),
+        early_close_time: time = time(13, 0),
+    ):
+        self.tz = ZoneInfo(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.early_close_time = early_close_time
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def holidays(year: int) -> Dict[date, str]:
+        days = {
+            _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+            _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+            _easter(year) - timedelta(days=2): "Good Friday",
+            _nth_weekday(year, 5, 0, -1): "Memorial Day",
+            _observed(date(year, 7, 4)): "Independence Day",
+            _nth_weekday(year, 9, 0, 1): "Labor Day",
+            _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+            _observed(date(year, 12, 25)): "Christmas Day",
+        }
+        # New Year's Day falling on a Saturday is not observed on the prior Friday
+        new_year = date(year, 1, 1)
+        if new_year.weekday() != 5:
+            days[_observed(new_year)] = "New Year's Day"
+        if year >= 2022:
+            days[_observed(date(year, 6, 19))] = "Juneteenth"
+        return days
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+    def is_early_close(self, day: date) -> bool:
+        if not self.is_trading_day(day):
+            return False
+        day_after_thanksgiving = _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1)
+        return day in (date(day.year, 7, 3), date(day.year, 12, 24), day_after_thanksgiving)
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """(open, close) of the regular session on a day, or None if closed"""
+        if not self.is_trading_day(day):
+            return None
+        close = self.early_close_time if self.is_early_close(day) else self.close_time
+        return (
+            datetime.combine(day, self.open_time, tzinfo=self.tz),
+            datetime.combine(day, close, tzinfo=self.tz),
+        )
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def is_open(self, at: Optional[datetime] = None) -> bool:
+        at = (at or self.now()).astimezone(self.tz)
+        session = self.session(at.date())
+        return session is not None and session[0] <= at < session[1]
+
+    def next_open(self, at: Optional[datetime] = None) -> datetime:
+        """Start of the next regular session strictly after `at`"""
+        at = (at or self.now()).astimezone(self.tz)
+        day = at.date()
+        for _ in range(15):
+            session = self.session(day)
+            if session is not None and session[0] > at:
+                return session[0]
+            day += timedelta(days=1)
+        raise RuntimeError("No trading session found in the next 15 days")
+
+    def current_close(self, at: Optional[datetime] = None) -> Optional[datetime]:
+        """Close of the session in progress at `at`, if any"""
+        at = (at or self.now()).astimezone(self.tz)
+        session = self.session(at.date())
+        if session is not None and session[0] <= at < session[1]:
+            return session[1]
+        return None
+
+
+class TTLPolicy:
+    """Computes a TTL in seconds at the moment a value is cached"""
+
+    def ttl(self, now: Optional[datetime] = None) -> int:
+        raise NotImplementedError
+
+
+class FixedTTL(TTLPolicy):
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+
+    def ttl(self, now: Optional[datetime] = None) -> int:
+        return self.seconds
+
+    def __repr__(self):
+        return f"FixedTTL({self.seconds})"
+
+
+class MarketHoursTTL(TTLPolicy):
+    """
+    Short TTL while the market is open, "until the next open" while closed
+
+    Args:
+        open_ttl: TTL during the regular session (capped at the close, plus grace)
+        close_grace: Seconds after the close during which closing prints still settle
+        closed_ttl: Cap on the TTL while closed (None = until the next open)
+        calendar: Exchange calendar
+    """
+
+    def __init__(
+        self,
+        open_ttl: int,
+        close_grace: int = 900,
+        closed_ttl: Optional[int] = None,
+        calendar: Optional[MarketCalendar] = None,
+    ):
+        self.open_ttl = open_ttl
+        self.close_grace = close_grace
+        self.closed_ttl = closed_ttl
+        self.calendar = calendar or market_calendar
+
+    def ttl(self, now: Optional[datetime] = None) -> int:
+        now = (now or self.calendar.now()).astimezone(self.calendar.tz)
+        close = self.calendar.current_close(now)
+        if close is not None:
+            until_settled = (close - now).total_seconds() + self.close_grace
+            return max(MIN_TTL, int(min(self.open_ttl, until_settled)))
+
+        # Shortly after the close, keep refreshing until the closing prints settle
+        session = self.calendar.session(now.date())
+        if session is not None and session[1] <= now < session[1] + timedelta(seconds=self.close_grace):
+            return max(MIN_TTL, min(self.open_ttl, int((session[1] + timedelta(seconds=self.close_grace) - now).total_seconds())))
+
+        until_open = int((self.calendar.next_open(now) - now).total_seconds())
+        if self.closed_ttl is not None:
+            until_open = min(until_open, self.closed_ttl)
+        return max(MIN_TTL, until_open)
+
+    def __repr__(self):
+        return f"MarketHoursTTL(open_ttl={self.open_ttl}, closed_ttl={self.closed_ttl})"
+
+
+class DailyRefreshTTL(TTLPolicy):
+    """
+    Expire at the next daily data load (e.g. the nightly OBQ/GuruFocus refresh)
+
+    Args:
+        refresh_time: Local time at which new data is available
+        calendar: Calendar supplying the timezone
+    """
+
+    def __init__(self, refresh_time: time, calendar: Optional[MarketCalendar] = None):
+        self.refresh_time = refresh_time
+        self.calendar = calendar or market_calendar
+
+    def ttl(self, now: Optional[datetime] = None) -> int:
+        now = (now or self.calendar.now()).astimezone(self.calendar.tz)
+        refresh = datetime.combine(now.date(), self.refresh_time, tzinfo=self.calendar.tz)
+        if refresh <= now:
+            refresh += timedelta(days=1)
+        return max(MIN_TTL, int((refresh - now).total_seconds()))
+
+    def __repr__(self):
+        return f"DailyRefreshTTL({self.refresh_time.isoformat()})"
+
+
+def resolve_ttl(ttl: Union[int, float, TTLPolicy, None]) -> Optional[int]:
+    """Turn a TTL or TTL policy into seconds"""
+    if isinstance(ttl, TTLPolicy):
+        return ttl.ttl()
+    return ttl
+
+
+def _parse_time(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+# Global calendar and the policies used across the backend
+market_calendar = MarketCalendar(timezone=settings.MARKET_TIMEZONE)
+PRICE_TTL = MarketHoursTTL(open_ttl=settings.PRICE_TTL_OPEN)
+# Summaries are capped while closed: the warmer re-runs within SUMMARY_TTL_CLOSED, so an
+# entry built during an upstream outage is repaired before the next open
+SUMMARY_TTL = MarketHoursTTL(open_ttl=settings.SUMMARY_TTL_OPEN, closed_ttl=settings.SUMMARY_TTL_CLOSED)
+SUMMARY_HARD_TTL = MarketHoursTTL(open_ttl=settings.SUMMARY_HARD_TTL_OPEN, closed_ttl=settings.SUMMARY_HARD_TTL_CLOSED)
+DEGRADED_SUMMARY_TTL = FixedTTL(settings.DEGRADED_SUMMARY_TTL)
+# Static Yahoo metadata (name, sector, industry, ...) is re-read once a day
+REFERENCE_TTL = DailyRefreshTTL(_parse_time(settings.REFERENCE_REFRESH_TIME))
+
+# The watermark poller evicts fundamentals as soon as a new OBQ load lands, so with
+# it running they only need a long backstop TTL instead of expiring every morning
+FUNDAMENTALS_TTL = (
+    FixedTTL(settings.FUNDAMENTALS_MAX_TTL)
+    if settings.WATERMARK_POLL_ENABLED
+    else DailyRefreshTTL(_parse_time(settings.FUNDAMENTALS_REFRESH_TIME))
+)
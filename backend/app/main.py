@@ -3,10 +3,37 @@ JCN Dashboard - FastAPI Backend
 Main application entry point
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import portfolios, stocks, mock
+from app.api.v1 import portfolios, stocks, mock, cache, ws
+from app.core.concurrency import duckdb_executor, io_executor
 from app.core.config import settings
+from app.core.http_cache import response_cache
+from app.core.loop_monitor import loop_monitor
+from app.services.cache_warmer import cache_warmer
+from app.services.quote_hub import quote_hub
+from app.services.watermark_poller import watermark_poller
+from app.utils.motherduck_pool import motherduck_pool
+from app.utils.yahoo_http import yahoo_http
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup, stop them on shutdown"""
+    await loop_monitor.start()
+    if settings.CACHE_WARMER_ENABLED:
+        await cache_warmer.start()
+    if settings.WATERMARK_POLL_ENABLED:
+        await watermark_poller.start()
+    yield
+    await quote_hub.stop()
+    await watermark_poller.stop()
+    await cache_warmer.stop()
+    await yahoo_http.close()
+    await loop_monitor.stop()
+    io_executor.shutdown()
+    duckdb_executor.shutdown()
+    motherduck_pool.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -15,7 +42,8 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -31,6 +59,8 @@ app.add_middleware(
 app.include_router(portfolios.router, prefix="/api/v1/portfolios", tags=["portfolios"])
 app.include_router(stocks.router, prefix="/api/v1/stocks", tags=["stocks"])
 app.include_router(mock.router, prefix="/api/v1/mock", tags=["mock"])
+app.include_router(cache.router, prefix="/api/v1/cache", tags=["cache"])
+app.include_router(ws.router, prefix="/ws", tags=["websocket"])
 
 @app.get("/")
 async def root():
@@ -44,7 +74,17 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "cache_warmer": cache_warmer.status(),
+        "watermark_poller": watermark_poller.status(),
+        "io_executor": io_executor.stats(),
+        "duckdb_executor": duckdb_executor.stats(),
+        "motherduck_pool": motherduck_pool.stats(),
+        "event_loop_lag": loop_monitor.status(),
+        "response_cache": response_cache.stats(),
+        "quote_hub": quote_hub.status()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -61,6 +61,7 @@ class PortfolioMetrics(BaseModel):
     ytd_return_percent: Optional[float] = None
     one_year_return_percent: Optional[float] = None
     sharpe_ratio: Optional[float] = None
+    sortino_ratio: Optional[float] = None
     volatility: Optional[float] = None
     max_drawdown: Optional[float] = None
     
@@ -76,6 +77,36 @@ class PortfolioSummary(BaseModel):
     description: str
     last_updated: datetime
     holdings: List[StockHolding]
-    performance: PortfolioPerformance
+    performance: Optional[PortfolioPerformance] = None  # None when not requested
     allocation: PortfolioAllocation
     metrics: PortfolioMetrics
+
+class HouseholdExposure(BaseModel):
+    """One symbol's combined position across several portfolios"""
+    symbol: str
+    company_name: str
+    shares: float
+    position_value: float
+    weight: float  # Percentage of the combined value
+    day_change: float
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    portfolios: List[str]  # Portfolio ids holding the symbol
+
+class HouseholdSummary(BaseModel):
+    """Aggregate exposure across several portfolios"""
+    portfolio_ids: List[str]
+    total_value: float
+    total_cost: float
+    total_gain_loss: float
+    total_gain_loss_percent: float
+    day_change: float
+    day_change_percent: float
+    num_holdings: int  # Distinct symbols
+    holdings: List[HouseholdExposure]
+    allocation: PortfolioAllocation
+
+class PortfolioBatch(BaseModel):
+    """Several portfolio summaries built from one shared fetch, plus their rollup"""
+    portfolios: Dict[str, PortfolioSummary]
+    household: HouseholdSummary
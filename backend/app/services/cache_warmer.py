@@ -0,0 +1,160 @@
+"""
+Cache warmer - precomputes portfolio data at startup and ahead of TTL expiry
+so that no user request pays for a cold fetch
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import cache
+from app.core.concurrency import MOTHERDUCK_HOST, duckdb_executor
+from app.core.config import settings
+from app.core.ttl_policy import SUMMARY_TTL, resolve_ttl
+from app.data.portfolio_holdings import get_portfolio_holdings
+from app.services.portfolio_service import PortfolioService, portfolio_service
+from app.utils.motherduck_client import motherduck_client
+
+
+class CacheWarmer:
+    """Refreshes fundamentals and every portfolio summary on a schedule"""
+
+    def __init__(
+        self,
+        service: PortfolioService,
+        concurrency: int = 2,
+        lead_time: int = 30,
+        min_interval: int = 60,
+    ):
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.lead_time = lead_time
+        self.min_interval = min_interval
+        self._task: Optional[asyncio.Task] = None
+        self._status: Dict[str, Any] = {
+            "state": "idle",
+            "runs": 0,
+            "tasks_total": 0,
+            "tasks_done": 0,
+            "tasks_failed": 0,
+            "tasks_skipped": 0,
+            "current": [],
+            "errors": {},
+            "last_started": None,
+            "last_finished": None,
+            "last_duration_seconds": None,
+            "next_run": None,
+        }
+
+    async def start(self):
+        """Start warming in the background (returns immediately)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever(), name="cache-warmer")
+
+    async def stop(self):
+        """Cancel the warmer loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._status["state"] = "stopped"
+
+    def next_delay(self) -> float:
+        """Seconds until the next run: just before the summary fresh window ends"""
+        return max(self.min_interval, resolve_ttl(SUMMARY_TTL) - self.lead_time)
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.warm_once()
+            except Exception as e:
+                print(f"Cache warmer run failed: {e}")
+            delay = self.next_delay()
+            self._status["next_run"] = datetime.fromtimestamp(time.time() + delay).isoformat()
+            self._status["state"] = "sleeping"
+            await asyncio.sleep(delay)
+
+    async def warm_once(self):
+        """Warm fundamentals for all holdings, then every portfolio summary"""
+        portfolio_ids: List[str] = list(self.service.portfolios)
+        started = time.perf_counter()
+        self._status.update({
+            "state": "running",
+            "tasks_total": len(portfolio_ids) + 1,
+            "tasks_done": 0,
+            "tasks_failed": 0,
+            "tasks_skipped": 0,
+            "current": [],
+            "errors": {},
+            "last_started": datetime.now().isoformat(),
+        })
+
+        # Fundamentals for the union of holdings first, so summaries hit the per-symbol cache
+        symbols = sorted({h['symbol'] for pid in portfolio_ids for h in get_portfolio_holdings(pid)})
+        await self._run_task("fundamentals", duckdb_executor.run(MOTHERDUCK_HOST, motherduck_client.get_fundamentals_records, symbols))
+
+        # Summaries (quotes + history) with bounded concurrency
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_portfolio(portfolio_id: str):
+            async with semaphore:
+                # Every worker runs a warmer; skip summaries a peer already refreshed
+                if await asyncio.to_thread(self._adopt_peer_summary, portfolio_id):
+                    self._status["tasks_skipped"] += 1
+                    return
+                await self._run_task(portfolio_id, self.service.refresh_portfolio_summary(portfolio_id))
+
+        await asyncio.gather(*(warm_portfolio(pid) for pid in portfolio_ids))
+
+        duration = time.perf_counter() - started
+        self._status.update({
+            "state": "idle",
+            "runs": self._status["runs"] + 1,
+            "last_finished": datetime.now().isoformat(),
+            "last_duration_seconds": round(duration, 3),
+        })
+        print(
+            f"Cache warmer: {self._status['tasks_done']}/{self._status['tasks_total']} tasks warmed "
+            f"({self._status['tasks_skipped']} fresh from a peer) in {duration:.1f}s"
+        )
+
+    def _adopt_peer_summary(self, portfolio_id: str) -> bool:
+        """
+        True if the persisted summary stays fresh beyond the lead time, i.e.
+        another worker refreshed it since this one last did; its value is
+        promoted into this worker's memory instead of being recomputed.
+        Runs on a worker thread (reads the persistent layer).
+        """
+        cache_key = PortfolioService.get_portfolio_summary.cache_key(self.service, portfolio_id)
+        now = time.time()
+        if cache.persisted_stale_at(cache_key) - now <= self.lead_time:
+            return False
+        return cache.load_persisted(cache_key, now) is not None
+
+    async def _run_task(self, name: str, awaitable):
+        self._status["current"].append(name)
+        try:
+            await awaitable
+            self._status["tasks_done"] += 1
+        except Exception as e:
+            self._status["tasks_failed"] += 1
+            self._status["errors"][name] = str(e)
+            print(f"Cache warmer failed for {name}: {e}")
+        finally:
+            self._status["current"].remove(name)
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the current/last run, reported in /health"""
+        return {**self._status, "current": list(self._status["current"]), "errors": dict(self._status["errors"])}
+
+# Global warmer instance
+cache_warmer = CacheWarmer(
+    portfolio_service,
+    concurrency=settings.CACHE_WARMER_CONCURRENCY,
+    lead_time=settings.CACHE_WARMER_LEAD_TIME,
+    min_interval=settings.CACHE_WARMER_MIN_INTERVAL,
+)
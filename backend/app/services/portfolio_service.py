@@ -2,9 +2,13 @@
 Portfolio service - Business logic for portfolio operations with MotherDuck integration
 """
 
-from typing import List, Dict, Optional
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from app.models.portfolio import (
+    HouseholdExposure,
+    HouseholdSummary,
+    PortfolioBatch,
     PortfolioSummary,
     StockHolding,
     PortfolioPerformance,
@@ -12,13 +16,48 @@ from app.models.portfolio import (
     PortfolioMetrics
 )
 from app.data.portfolio_holdings import get_portfolio_holdings
+from app.services.stock_service import stock_service
 from app.utils.yfinance_client import yfinance_client
-from app.utils.motherduck_client import motherduck_client
-from app.core.cache import cached
-import yfinance as yf
+from app.utils.motherduck_client import FUNDAMENTALS_TABLES, motherduck_client
+from app.utils.nav import performance_frame
+from app.utils.price_store import price_store
+from app.utils.risk import risk_metrics
+from app.core.config import settings
+from app.core.cache import cache, cached, compute_shared, portfolio_tag, single_flight, symbol_tag, table_tag
+from app.core.concurrency import MOTHERDUCK_HOST, PRICE_STORE_HOST, YAHOO_HOST, duckdb_executor, io_executor
+from app.core.ttl_policy import DEGRADED_SUMMARY_TTL, SUMMARY_TTL, SUMMARY_HARD_TTL
 import pandas as pd
 from collections import defaultdict
 
+SP500_SYMBOL = '^GSPC'
+
+# Sections of a PortfolioSummary a client can ask for, and named presets of them
+SUMMARY_SECTIONS = ("holdings", "fundamentals", "performance", "allocation", "metrics")
+SUMMARY_VIEWS = {
+    "full": frozenset(SUMMARY_SECTIONS),
+    "summary": frozenset({"holdings", "allocation", "metrics"}),  # no fundamentals or history
+}
+
+def _summary_tags(service: "PortfolioService", portfolio_id: str, *args, **kwargs) -> List[str]:
+    """A summary depends on the portfolio, each holding's data and the fundamentals tables"""
+    return [
+        portfolio_tag(portfolio_id),
+        *(symbol_tag(h['symbol']) for h in get_portfolio_holdings(portfolio_id)),
+        *(table_tag(table) for table in FUNDAMENTALS_TABLES),
+    ]
+
+def _summary_degraded(summary: "PortfolioSummary", service: "PortfolioService", portfolio_id: str, fundamentals: bool = True, performance: bool = True) -> bool:
+    """A summary built around a failed upstream: an unpriced holding, or a requested section that came back empty"""
+    if any(not h.current_price for h in summary.holdings):
+        return True
+    if fundamentals and not any(h.fundamentals for h in summary.holdings):
+        return True
+    return performance and (summary.performance is None or not summary.performance.dates)
+
+async def _resolved(value: Any) -> Any:
+    """Awaitable standing in for a section that was not requested"""
+    return value
+
 class PortfolioService:
     """Service for portfolio operations"""
     
@@ -38,94 +77,266 @@ class PortfolioService:
             }
         }
     
-    @cached(ttl=600, key_prefix="portfolio", persist=True)  # 10min cache with disk persistence
-    async def get_portfolio_summary(self, portfolio_id: str) -> PortfolioSummary:
-        """Get complete portfolio summary with real holdings and MotherDuck data"""
+    def _get_holdings_data(self, portfolio_id: str) -> List[Dict]:
+        """Holdings for a known portfolio (ValueError if unknown or empty)"""
         if portfolio_id not in self.portfolios:
             raise ValueError(f"Portfolio {portfolio_id} not found")
-        
-        portfolio_config = self.portfolios[portfolio_id]
         holdings_data = get_portfolio_holdings(portfolio_id)
-        
         if not holdings_data:
             raise ValueError(f"No holdings data for portfolio {portfolio_id}")
+        return holdings_data
+    
+    @cached(
+        ttl=SUMMARY_TTL,
+        hard_ttl=SUMMARY_HARD_TTL,  # market-hours aware, served stale while refreshing
+        key_prefix="portfolio",
+        persist=True,
+        tags=_summary_tags,
+        degraded=_summary_degraded,  # an outage's empty sections are retried within a minute
+        degraded_ttl=DEGRADED_SUMMARY_TTL,
+    )
+    async def get_portfolio_summary(self, portfolio_id: str, fundamentals: bool = True, performance: bool = True) -> PortfolioSummary:
+        """
+        Get complete portfolio summary with real holdings and MotherDuck data
+        
+        Args:
+            portfolio_id: Portfolio to summarize
+            fundamentals: Query MotherDuck fundamentals for each holding
+            performance: Build the one-year NAV series (also feeds the risk metrics)
+        """
+        holdings_data = self._get_holdings_data(portfolio_id)
         
         # Extract symbols
         symbols = [h['symbol'] for h in holdings_data]
         
-        # Fetch current prices and market data from yfinance
-        holdings = []
-        total_value = 0
-        total_cost = 0
-        day_change_total = 0
+        # Quotes, reference data, fundamentals and history are independent: fetch them concurrently,
+        # off the event loop. Quotes come from the async Yahoo HTTP provider; static
+        # metadata from the daily reference cache (Ticker.info only on a miss)
+        quotes, references, fundamentals_by_symbol, performance_data = await asyncio.gather(
+            self._get_quotes(symbols),
+            self._get_references(symbols),
+            self._get_fundamentals(symbols) if fundamentals else _resolved({}),
+            self._get_performance_data(holdings_data, symbols) if performance else _resolved(None),
+        )
         
-        for holding_data in holdings_data:
-            symbol = holding_data['symbol']
-            shares = holding_data['shares']
-            cost_basis = holding_data['cost_basis']
-            
-            # Get current stock info
-            stock_info = yfinance_client.get_stock_info(symbol)
-            current_price = stock_info.get('current_price', 0)
-            
-            # Calculate position metrics
-            position_value = current_price * shares
-            total_cost_for_position = cost_basis * shares
-            gain_loss = position_value - total_cost_for_position
-            gain_loss_percent = (gain_loss / total_cost_for_position * 100) if total_cost_for_position > 0 else 0
-            
-            # Day change
-            day_change_percent = stock_info.get('change_percent', 0)
-            day_change = position_value * (day_change_percent / 100)
-            
-            total_value += position_value
-            total_cost += total_cost_for_position
-            day_change_total += day_change
-            
-            holding = StockHolding(
-                symbol=symbol,
-                company_name=stock_info.get('name', symbol),
-                shares=shares,
-                cost_basis=cost_basis,
-                current_price=current_price,
-                position_value=position_value,
-                total_cost=total_cost_for_position,
-                gain_loss=gain_loss,
-                gain_loss_percent=gain_loss_percent,
-                weight=0,  # Will calculate after we have total_value
-                day_change=day_change,
-                day_change_percent=day_change_percent,
-                market_cap=stock_info.get('market_cap'),
-                pe_ratio=stock_info.get('pe_ratio'),
-                dividend_yield=stock_info.get('dividend_yield'),
-                beta=stock_info.get('beta'),
-                sector=stock_info.get('sector'),
-                industry=stock_info.get('industry'),
-                fundamentals=None  # Will add from MotherDuck
+        holdings = [
+            self._build_holding(
+                holding_data,
+                quotes[holding_data['symbol']],
+                references[holding_data['symbol']],
+                fundamentals_by_symbol.get(holding_data['symbol']),
             )
-            holdings.append(holding)
+            for holding_data in holdings_data
+        ]
+        return self._build_summary(portfolio_id, holdings, performance_data)
+    
+    async def get_portfolio_sections(self, portfolio_id: str, sections: Iterable[str]) -> PortfolioSummary:
+        """
+        Portfolio summary computing only what the requested sections need
+        
+        Fundamentals (a MotherDuck query) and performance (a year of history)
+        are skipped when not requested. If the full summary is already cached
+        it serves every selection instead.
+        
+        Args:
+            portfolio_id: Portfolio to summarize
+            sections: Names from SUMMARY_SECTIONS
+        """
+        sections = set(sections)
+        with_fundamentals = "fundamentals" in sections
+        with_performance = "performance" in sections
+        if not (with_fundamentals and with_performance):
+            if cache.has(PortfolioService.get_portfolio_summary.cache_key(self, portfolio_id)):
+                with_fundamentals = with_performance = True
+        return await self.get_portfolio_summary(portfolio_id, fundamentals=with_fundamentals, performance=with_performance)
+    
+    async def get_portfolio_batch(self, portfolio_ids: List[str], sections: Iterable[str] = SUMMARY_SECTIONS) -> PortfolioBatch:
+        """
+        Summaries for several portfolios from one shared fetch, plus a household rollup
+        
+        Portfolios whose summary is already cached are served from the cache.
+        For the rest, quotes, reference data, fundamentals and history are
+        fetched once for the union of their symbols, so a symbol held in
+        several portfolios is priced once. Each summary built this way is
+        computed and cached exactly as get_portfolio_summary would (single
+        flight per summary, cross-process lease, degraded summaries kept briefly).
+        
+        Args:
+            portfolio_ids: Portfolios to include (ValueError if any is unknown)
+            sections: Names from SUMMARY_SECTIONS, as for get_portfolio_sections
+        """
+        portfolio_ids = list(dict.fromkeys(portfolio_ids))
+        holdings_by_id = {pid: self._get_holdings_data(pid) for pid in portfolio_ids}
+        sections = set(sections)
+        with_fundamentals = "fundamentals" in sections
+        with_performance = "performance" in sections
+        
+        summary_key = PortfolioService.get_portfolio_summary.cache_key
+        cached_ids = [
+            pid for pid in portfolio_ids
+            if cache.has(summary_key(self, pid)) or cache.has(summary_key(self, pid, with_fundamentals, with_performance))
+        ]
+        summaries = dict(zip(cached_ids, await asyncio.gather(*(self.get_portfolio_sections(pid, sections) for pid in cached_ids))))
+        
+        to_build = {pid: holdings for pid, holdings in holdings_by_id.items() if pid not in summaries}
+        if to_build:
+            summaries.update(await self._build_batch(to_build, with_fundamentals, with_performance))
+        
+        ordered = {pid: summaries[pid] for pid in portfolio_ids}
+        return PortfolioBatch(portfolios=ordered, household=self._build_household(ordered))
+    
+    async def _build_batch(self, holdings_by_id: Dict[str, List[Dict]], with_fundamentals: bool, with_performance: bool) -> Dict[str, PortfolioSummary]:
+        """
+        Build several summaries from one fetch of the union of their symbols
+        
+        Each summary goes through the same single flight and cross-process
+        lease as get_portfolio_summary, so a concurrent request, batch or warmer
+        computing one of them is awaited (or its persisted result picked up)
+        instead of repeated. The union fetch starts on the first summary that
+        actually has to be built.
+        """
+        union = list(dict.fromkeys(h['symbol'] for holdings_data in holdings_by_id.values() for h in holdings_data))
+        fetch: Optional[asyncio.Future] = None
+        
+        async def history():
+            try:
+                return await self._get_history(union)
+            except Exception as e:
+                print(f"Error getting performance data: {e}")
+                return None
+        
+        def shared_fetch() -> asyncio.Future:
+            nonlocal fetch
+            if fetch is None:
+                print(f"Building {len(holdings_by_id)} portfolios from one fetch of {len(union)} symbols")
+                fetch = asyncio.ensure_future(asyncio.gather(
+                    self._get_quotes(union),
+                    self._get_references(union),
+                    self._get_fundamentals(union) if with_fundamentals else _resolved({}),
+                    history() if with_performance else _resolved(None),
+                ))
+            return fetch
+        
+        async def build(portfolio_id: str, holdings_data: List[Dict]) -> PortfolioSummary:
+            quotes, references, fundamentals, prices = await asyncio.shield(shared_fetch())
+            holdings = [
+                self._build_holding(h, quotes[h['symbol']], references[h['symbol']], fundamentals.get(h['symbol']))
+                for h in holdings_data
+            ]
+            performance = None
+            if with_performance:
+                # A failed history fetch leaves the performance empty, which marks the summary degraded
+                performance = (
+                    self._performance_from_prices(holdings_data, prices) if prices is not None
+                    else PortfolioPerformance(dates=[], portfolio_values=[], sp500_values=[])
+                )
+            summary = self._build_summary(portfolio_id, holdings, performance)
+            PortfolioService.get_portfolio_summary.store(summary, self, portfolio_id, with_fundamentals, with_performance)
+            return summary
+        
+        def summary(portfolio_id: str, holdings_data: List[Dict]) -> Awaitable[PortfolioSummary]:
+            cache_key = PortfolioService.get_portfolio_summary.cache_key(self, portfolio_id, with_fundamentals, with_performance)
+            return single_flight.run(cache_key, lambda: compute_shared(
+                cache_key, lambda: build(portfolio_id, holdings_data), SUMMARY_TTL, SUMMARY_HARD_TTL,
+            ))
+        
+        built = await asyncio.gather(*(summary(pid, holdings_data) for pid, holdings_data in holdings_by_id.items()))
+        return dict(zip(holdings_by_id, built))
+    
+    def _build_household(self, summaries: Dict[str, PortfolioSummary]) -> HouseholdSummary:
+        """Combined exposure per symbol, sector and industry across portfolios"""
+        exposures: Dict[str, Dict[str, Any]] = {}
+        for portfolio_id, summary in summaries.items():
+            for h in summary.holdings:
+                exposure = exposures.setdefault(h.symbol, {
+                    "symbol": h.symbol,
+                    "company_name": h.company_name,
+                    "shares": 0.0,
+                    "position_value": 0.0,
+                    "day_change": 0.0,
+                    "sector": h.sector,
+                    "industry": h.industry,
+                    "portfolios": [],
+                })
+                exposure["shares"] += h.shares
+                exposure["position_value"] += h.position_value
+                exposure["day_change"] += h.day_change or 0
+                exposure["portfolios"].append(portfolio_id)
+        
+        total_value = sum(s.metrics.total_value for s in summaries.values())
+        total_cost = sum(s.metrics.total_cost for s in summaries.values())
+        day_change = sum(s.metrics.day_change for s in summaries.values())
+        total_gain_loss = total_value - total_cost
+        
+        holdings = [
+            HouseholdExposure(**exposure, weight=(exposure["position_value"] / total_value * 100) if total_value > 0 else 0)
+            for exposure in sorted(exposures.values(), key=lambda e: e["position_value"], reverse=True)
+        ]
+        return HouseholdSummary(
+            portfolio_ids=list(summaries),
+            total_value=total_value,
+            total_cost=total_cost,
+            total_gain_loss=total_gain_loss,
+            total_gain_loss_percent=(total_gain_loss / total_cost * 100) if total_cost > 0 else 0,
+            day_change=day_change,
+            day_change_percent=(day_change / total_value * 100) if total_value > 0 else 0,
+            num_holdings=len(holdings),
+            holdings=holdings,
+            allocation=self._calculate_allocation(holdings),
+        )
+    
+    def _build_holding(self, holding_data: Dict, quote: Dict, reference: Dict, fundamentals: Optional[Dict] = None) -> StockHolding:
+        """Position metrics for one holding (weight is filled in by _build_summary)"""
+        stock_info = {**reference, **quote}
+        symbol = holding_data['symbol']
+        shares = holding_data['shares']
+        cost_basis = holding_data['cost_basis']
+        
+        current_price = stock_info.get('current_price', 0)
+        
+        # Calculate position metrics
+        position_value = current_price * shares
+        total_cost_for_position = cost_basis * shares
+        gain_loss = position_value - total_cost_for_position
+        gain_loss_percent = (gain_loss / total_cost_for_position * 100) if total_cost_for_position > 0 else 0
+        
+        # Day change
+        day_change_percent = stock_info.get('change_percent', 0)
+        day_change = position_value * (day_change_percent / 100)
+        
+        return StockHolding(
+            symbol=symbol,
+            company_name=stock_info.get('name', symbol),
+            shares=shares,
+            cost_basis=cost_basis,
+            current_price=current_price,
+            position_value=position_value,
+            total_cost=total_cost_for_position,
+            gain_loss=gain_loss,
+            gain_loss_percent=gain_loss_percent,
+            weight=0,  # Will calculate after we have total_value
+            day_change=day_change,
+            day_change_percent=day_change_percent,
+            market_cap=stock_info.get('market_cap'),
+            pe_ratio=stock_info.get('pe_ratio'),
+            dividend_yield=stock_info.get('dividend_yield'),
+            beta=stock_info.get('beta'),
+            sector=stock_info.get('sector'),
+            industry=stock_info.get('industry'),
+            fundamentals=fundamentals
+        )
+    
+    def _build_summary(self, portfolio_id: str, holdings: List[StockHolding], performance: Optional[PortfolioPerformance]) -> PortfolioSummary:
+        """Weights, allocation and aggregate metrics from priced holdings and the NAV series (if built)"""
+        portfolio_config = self.portfolios[portfolio_id]
+        total_value = sum(h.position_value for h in holdings)
+        total_cost = sum(h.total_cost for h in holdings)
+        day_change_total = sum(h.day_change or 0 for h in holdings)
         
         # Calculate weights
         for holding in holdings:
             holding.weight = (holding.position_value / total_value * 100) if total_value > 0 else 0
         
-        # Fetch fundamentals from MotherDuck
-        try:
-            fundamentals_df = motherduck_client.get_fundamentals(symbols)
-            if fundamentals_df is not None:
-                # Add fundamentals to each holding
-                for holding in holdings:
-                    fund_row = fundamentals_df[fundamentals_df['Symbol'] == holding.symbol]
-                    if not fund_row.empty:
-                        # Convert row to dict and add to holding
-                        holding.fundamentals = fund_row.iloc[0].to_dict()
-        except Exception as e:
-            print(f"Error fetching fundamentals from MotherDuck: {e}")
-            # Continue without fundamentals
-        
-        # Get performance data (historical portfolio value)
-        performance = await self._get_performance_data(holdings_data, symbols)
-        
         # Calculate allocation breakdowns
         allocation = self._calculate_allocation(holdings)
         
@@ -134,6 +345,9 @@ class PortfolioService:
         total_gain_loss_percent = (total_gain_loss / total_cost * 100) if total_cost > 0 else 0
         day_change_percent = (day_change_total / total_value * 100) if total_value > 0 else 0
         
+        # Risk/return analytics from the NAV series we already have
+        risk = risk_metrics(performance.dates, performance.portfolio_values, settings.RISK_FREE_RATE) if performance else risk_metrics([], [])
+        
         # Calculate portfolio averages
         valid_pe = [h.pe_ratio for h in holdings if h.pe_ratio is not None and h.pe_ratio > 0]
         valid_div = [h.dividend_yield for h in holdings if h.dividend_yield is not None]
@@ -148,11 +362,12 @@ class PortfolioService:
             num_holdings=len(holdings),
             day_change=day_change_total,
             day_change_percent=day_change_percent,
-            ytd_return_percent=None,  # TODO: Calculate from performance data
-            one_year_return_percent=None,  # TODO: Calculate from performance data
-            sharpe_ratio=None,  # TODO: Calculate
-            volatility=None,  # TODO: Calculate
-            max_drawdown=None,  # TODO: Calculate
+            ytd_return_percent=risk["ytd_return_percent"],
+            one_year_return_percent=risk["one_year_return_percent"],
+            sharpe_ratio=risk["sharpe_ratio"],
+            sortino_ratio=risk["sortino_ratio"],
+            volatility=risk["volatility"],
+            max_drawdown=risk["max_drawdown"],
             avg_pe_ratio=sum(valid_pe) / len(valid_pe) if valid_pe else None,
             avg_dividend_yield=sum(valid_div) / len(valid_div) if valid_div else None,
             avg_beta=sum(valid_beta) / len(valid_beta) if valid_beta else None
@@ -169,71 +384,182 @@ class PortfolioService:
             metrics=metrics
         )
     
+    def stream_portfolio_summary(self, portfolio_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Portfolio summary as a series of events, each sent as soon as its data resolves
+        
+        The portfolio is validated before anything is produced (ValueError), so
+        the caller can still answer 404. Events are dicts with an "event" key:
+            skeleton: name, description and each holding's symbol, shares and cost basis
+            holding: one priced holding (without weight and fundamentals), once the
+                batched quotes arrive; a holding that could not be priced is sent
+                with a zero price and an "error" key instead of failing the stream
+            fundamentals: symbol -> MotherDuck fundamentals
+            performance: NAV and S&P 500 series
+            summary: weight per symbol, allocation and metrics, once everything is in
+        The completed summary is cached like get_portfolio_summary; a cached
+        summary is replayed as the same events immediately.
+        """
+        holdings_data = self._get_holdings_data(portfolio_id)
+        return self._stream_summary(portfolio_id, holdings_data)
+    
+    async def _stream_summary(self, portfolio_id: str, holdings_data: List[Dict]) -> AsyncIterator[Dict[str, Any]]:
+        portfolio_config = self.portfolios[portfolio_id]
+        yield {
+            "event": "skeleton",
+            "portfolio_id": portfolio_id,
+            "name": portfolio_config["name"],
+            "description": portfolio_config["description"],
+            "holdings": [{"symbol": h['symbol'], "shares": h['shares'], "cost_basis": h['cost_basis']} for h in holdings_data],
+        }
+        
+        cache_key = PortfolioService.get_portfolio_summary.cache_key(self, portfolio_id)
+        if cache.has(cache_key):
+            summary = await self.get_portfolio_summary(portfolio_id)
+            for event in self._summary_events(summary):
+                yield event
+            return
+        
+        symbols = [h['symbol'] for h in holdings_data]
+        fundamentals_task = asyncio.create_task(self._get_fundamentals(symbols))
+        performance_task = asyncio.create_task(self._get_performance_data(holdings_data, symbols))
+        pricing_task = asyncio.create_task(self._price_holdings(holdings_data))
+        holdings: Dict[str, StockHolding] = {}
+        pending = {fundamentals_task, performance_task, pricing_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is fundamentals_task:
+                        yield {"event": "fundamentals", "fundamentals": task.result()}
+                    elif task is performance_task:
+                        yield {"event": "performance", "performance": task.result().model_dump(mode="json")}
+                    else:
+                        for holding, error in task.result():
+                            holdings[holding.symbol] = holding
+                            event = {"event": "holding", "holding": holding.model_dump(mode="json", exclude={"fundamentals", "weight"})}
+                            if error is not None:
+                                event["error"] = error
+                            yield event
+        finally:
+            # Client disconnected or a section failed: stop the remaining fetches
+            for task in pending:
+                task.cancel()
+        
+        fundamentals = fundamentals_task.result()
+        ordered = [holdings[h['symbol']] for h in holdings_data]
+        for holding in ordered:
+            holding.fundamentals = fundamentals.get(holding.symbol)
+        summary = self._build_summary(portfolio_id, ordered, performance_task.result())
+        PortfolioService.get_portfolio_summary.store(summary, self, portfolio_id)
+        yield self._summary_event(summary)
+    
+    async def _price_holdings(self, holdings_data: List[Dict]) -> List[Tuple[StockHolding, Optional[str]]]:
+        """
+        Price every holding from one batched quote and reference fetch (fundamentals are streamed separately)
+        
+        Returns:
+            (holding, error) per holding; a holding without a quote, or whose
+            quote could not be used, gets the default quote and reference and
+            the reason as error
+        """
+        symbols = [h['symbol'] for h in holdings_data]
+        quotes, references = await asyncio.gather(
+            self._get_quotes(symbols),
+            self._get_references(symbols),
+            return_exceptions=True,
+        )
+        failure = None
+        if isinstance(quotes, BaseException):
+            print(f"Error getting quotes: {quotes!r}")
+            failure = f"Quotes unavailable: {quotes}"
+            quotes = {}
+        if isinstance(references, BaseException):
+            print(f"Error getting reference data: {references!r}")
+            references = {}
+        
+        priced = []
+        for holding_data in holdings_data:
+            symbol = holding_data['symbol']
+            quote = quotes.get(symbol)
+            reference = references.get(symbol) or yfinance_client.default_reference(symbol)
+            error = None if quote is not None else failure or f"No quote for {symbol}"
+            try:
+                holding = self._build_holding(holding_data, quote or yfinance_client.default_quote(symbol), reference)
+            except Exception as e:
+                print(f"Error pricing {symbol}: {e!r}")
+                error = f"Could not price {symbol}: {e}"
+                holding = self._build_holding(holding_data, yfinance_client.default_quote(symbol), yfinance_client.default_reference(symbol))
+            priced.append((holding, error))
+        return priced
+    
+    def _summary_events(self, summary: PortfolioSummary) -> Iterator[Dict[str, Any]]:
+        """Replay a complete summary as stream events"""
+        for holding in summary.holdings:
+            yield {"event": "holding", "holding": holding.model_dump(mode="json", exclude={"fundamentals", "weight"})}
+        yield {"event": "fundamentals", "fundamentals": {h.symbol: h.fundamentals for h in summary.holdings if h.fundamentals}}
+        yield {"event": "performance", "performance": summary.performance.model_dump(mode="json")}
+        yield self._summary_event(summary)
+    
+    @staticmethod
+    def _summary_event(summary: PortfolioSummary) -> Dict[str, Any]:
+        return {
+            "event": "summary",
+            "last_updated": summary.last_updated.isoformat(),
+            "weights": {h.symbol: h.weight for h in summary.holdings},
+            "allocation": summary.allocation.model_dump(mode="json"),
+            "metrics": summary.metrics.model_dump(mode="json"),
+        }
+    
+    async def refresh_portfolio_summary(self, portfolio_id: str) -> PortfolioSummary:
+        """Recompute the cached portfolio summary ahead of its expiry"""
+        return await PortfolioService.get_portfolio_summary.refresh(self, portfolio_id)
+    
+    async def _get_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Live quotes (async HTTP, yfinance fallback); not the short-lived quote cache, summaries have their own TTL"""
+        return await stock_service.fetch_quotes(symbols)
+    
+    async def _get_references(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Static Yahoo metadata keyed by symbol
+        
+        Cached references are read on the event loop; only misses go to the
+        I/O pool (one slow Ticker.info each). A symbol whose lookup fails or
+        times out gets the default reference instead of failing the summary.
+        """
+        references = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            reference = yfinance_client.get_cached_reference(symbol)
+            if reference is None:
+                missing.append(symbol)
+            else:
+                references[symbol] = reference
+        results = await asyncio.gather(
+            *(io_executor.run(YAHOO_HOST, yfinance_client.get_reference, symbol) for symbol in missing),
+            return_exceptions=True,
+        )
+        for symbol, result in zip(missing, results):
+            if isinstance(result, BaseException):
+                print(f"Error getting reference data for {symbol}: {result!r}")
+                result = yfinance_client.default_reference(symbol)
+            references[symbol] = result
+        return references
+    
+    async def _get_fundamentals(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fundamentals from MotherDuck keyed by symbol (empty if unavailable)"""
+        try:
+            return await duckdb_executor.run(MOTHERDUCK_HOST, motherduck_client.get_fundamentals_records, symbols)
+        except Exception as e:
+            print(f"Error fetching fundamentals from MotherDuck: {e}")
+            # Continue without fundamentals
+            return {}
+    
     async def _get_performance_data(self, holdings_data: List[Dict], symbols: List[str]) -> PortfolioPerformance:
         """Get historical performance data for portfolio"""
         try:
-            # Get 1 year of historical data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365)
-            
-            # Download historical data for all symbols
-            data = yf.download(symbols, start=start_date, end=end_date, progress=False)
-            
-            if data.empty:
-                # Return empty performance data
-                return PortfolioPerformance(
-                    dates=[],
-                    portfolio_values=[],
-                    sp500_values=[]
-                )
-            
-            # Get adjusted close prices
-            if len(symbols) == 1:
-                prices = data['Adj Close'].to_frame()
-                prices.columns = [symbols[0]]
-            else:
-                prices = data['Adj Close']
-            
-            # Calculate portfolio value over time
-            portfolio_values = []
-            dates = []
-            
-            for date, row in prices.iterrows():
-                portfolio_value = 0
-                for holding in holdings_data:
-                    symbol = holding['symbol']
-                    shares = holding['shares']
-                    if symbol in row and not pd.isna(row[symbol]):
-                        portfolio_value += row[symbol] * shares
-                
-                if portfolio_value > 0:
-                    portfolio_values.append(portfolio_value)
-                    dates.append(date.strftime('%Y-%m-%d'))
-            
-            # Get S&P 500 benchmark data
-            sp500_data = yf.download('^GSPC', start=start_date, end=end_date, progress=False)
-            sp500_values = []
-            
-            if not sp500_data.empty:
-                # Normalize to 100 at start
-                sp500_prices = sp500_data['Adj Close']
-                if len(sp500_prices) > 0:
-                    start_value = sp500_prices.iloc[0]
-                    sp500_values = [(price / start_value * 100) for price in sp500_prices]
-            
-            # Normalize portfolio values to match dates
-            if len(sp500_values) > len(portfolio_values):
-                sp500_values = sp500_values[:len(portfolio_values)]
-            elif len(portfolio_values) > len(sp500_values):
-                portfolio_values = portfolio_values[:len(sp500_values)]
-                dates = dates[:len(sp500_values)]
-            
-            return PortfolioPerformance(
-                dates=dates,
-                portfolio_values=portfolio_values,
-                sp500_values=sp500_values
-            )
-            
+            prices = await self._get_history(symbols)
+            return self._performance_from_prices(holdings_data, prices)
         except Exception as e:
             print(f"Error getting performance data: {e}")
             return PortfolioPerformance(
@@ -242,7 +568,28 @@ class PortfolioService:
                 sp500_values=[]
             )
     
-    def _calculate_allocation(self, holdings: List[StockHolding]) -> PortfolioAllocation:
+    async def _get_history(self, symbols: List[str]):
+        """One year of adjusted closes for symbols and the S&P 500 from the local price store (a small delta download at most once a day)"""
+        start_date = (datetime.now() - timedelta(days=365)).date()
+        symbols = list(symbols) + [SP500_SYMBOL]
+        # Only the download counts against the Yahoo limit and timeout; the read is local disk
+        await io_executor.run(YAHOO_HOST, price_store.update, symbols, start_date)
+        return await io_executor.run(PRICE_STORE_HOST, price_store.prices, symbols, start_date, update=False)
+    
+    def _performance_from_prices(self, holdings_data: List[Dict], prices: pd.DataFrame) -> PortfolioPerformance:
+        """NAV = price matrix @ share vector; S&P 500 joined on the portfolio's trading days"""
+        shares = pd.Series({h['symbol']: h['shares'] for h in holdings_data}, dtype=float)
+        held = prices.reindex(columns=[s for s in dict.fromkeys(shares.index) if s in prices.columns])
+        sp500 = prices[SP500_SYMBOL] if SP500_SYMBOL in prices else None
+        frame = performance_frame(held, shares, {"sp500": sp500} if sp500 is not None else None)
+        
+        return PortfolioPerformance(
+            dates=frame.index.strftime('%Y-%m-%d').tolist(),
+            portfolio_values=frame["portfolio"].tolist(),
+            sp500_values=frame["sp500"].tolist() if "sp500" in frame else []
+        )
+    
+    def _calculate_allocation(self, holdings: List[Union[StockHolding, HouseholdExposure]]) -> PortfolioAllocation:
         """Calculate portfolio allocation breakdowns"""
         by_stock = {h.symbol: h.weight for h in holdings}
         
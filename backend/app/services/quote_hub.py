@@ -0,0 +1,433 @@
+"""
+Live portfolio quotes pushed over WebSockets (/ws/portfolios/{id})
+
+One QuoteHub polls the feed for the union of symbols held by portfolios that
+currently have listeners, once per interval, no matter how many clients are
+connected. Each portfolio channel prices its holdings from those quotes and
+diffs them against what it pushed last, so clients only receive fields that
+changed, under short keys:
+
+    {"t": "snapshot", "ts": 1718900000000,
+     "h": {"AAPL": {"p": 190.12, "dc": 35.1, "dcp": 0.42, "v": 19012.0, "w": 8.31}, ...},
+     "m": {"v": 228741.5, "dc": 1210.4, "dcp": 0.53}}
+    {"t": "delta", "ts": 1718900005000, "h": {"AAPL": {"p": 190.2, "v": 19020.0}}, "m": {"v": 228749.5}}
+
+p = price, dc = day change ($), dcp = day change (%), v = position value,
+w = weight (%); "m" carries the portfolio totals. A poll that changes nothing
+sends nothing.
+
+Each message is encoded once per channel and shared by its clients. Every
+client has a bounded send queue: a client too slow to drain it has its
+backlog replaced by one fresh snapshot (so it is never more than one message
+behind and memory stays bounded), and a send that stalls for send_timeout
+closes the connection.
+
+The feed is pluggable: QUOTE_FEED=fake swaps Yahoo for a local random walk so
+the channel can be load-tested offline.
+"""
+
+import asyncio
+import random
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.core.http_cache import dumps
+from app.core.ttl_policy import market_calendar
+from app.data.portfolio_holdings import get_portfolio_holdings
+from app.services.stock_service import stock_service
+
+# Decimal places kept per field; smaller moves are not worth a delta
+FIELD_PRECISION = {"p": 4, "dc": 2, "dcp": 4, "v": 2, "w": 4}
+
+CLOSE_NOT_FOUND = 4404  # application close code: unknown portfolio
+CLOSE_TOO_SLOW = 1013  # "try again later": the client could not keep up
+
+
+class QuoteFeed:
+    """Source of quotes for the hub"""
+
+    name = "base"
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest quotes for symbols
+
+        Returns:
+            Dict of symbol -> {symbol, current_price, previous_close, change_percent};
+            symbols that could not be priced may be missing or have a zero price
+        """
+        raise NotImplementedError
+
+
+class YahooQuoteFeed(QuoteFeed):
+    """
+    Yahoo quotes through the stock service
+
+    During the session every poll fetches live quotes (and refreshes the
+    shared quote cache); while the market is closed the cached last quote is
+    served, so idle listeners cost no upstream calls.
+    """
+
+    name = "yahoo"
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        if market_calendar.is_open():
+            return await stock_service.refresh_quotes(symbols)
+        return await stock_service.get_quotes(symbols)
+
+
+class FakeQuoteFeed(QuoteFeed):
+    """
+    Local random-walk quotes for offline development and load tests
+
+    Args:
+        volatility: Standard deviation of one move, as a fraction of price
+        move_probability: Chance a symbol moves on a given poll
+        seed: Seed for reproducible walks
+    """
+
+    name = "fake"
+
+    def __init__(self, volatility: float = 0.001, move_probability: float = 0.5, seed: Optional[int] = None):
+        self.volatility = volatility
+        self.move_probability = move_probability
+        self._rng = random.Random(seed)
+        self._prices: Dict[str, float] = {}
+        self._previous_close: Dict[str, float] = {}
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes = {}
+        for symbol in symbols:
+            if symbol not in self._prices:
+                # Stable per-symbol starting price between 20 and 500
+                start = 20 + (zlib.crc32(symbol.encode()) % 48000) / 100
+                self._prices[symbol] = self._previous_close[symbol] = start
+            elif self._rng.random() < self.move_probability:
+                self._prices[symbol] = max(0.01, self._prices[symbol] * (1 + self._rng.gauss(0, self.volatility)))
+            price, previous_close = self._prices[symbol], self._previous_close[symbol]
+            quotes[symbol] = {
+                "symbol": symbol,
+                "current_price": price,
+                "previous_close": previous_close,
+                "change_percent": (price - previous_close) / previous_close * 100,
+            }
+        return quotes
+
+
+QUOTE_FEEDS = {"yahoo": YahooQuoteFeed, "fake": FakeQuoteFeed}
+
+
+def make_feed(name: str) -> QuoteFeed:
+    """Quote feed by name (QUOTE_FEED setting)"""
+    if name not in QUOTE_FEEDS:
+        raise ValueError(f"Unknown quote feed '{name}' (expected one of {', '.join(QUOTE_FEEDS)})")
+    return QUOTE_FEEDS[name]()
+
+
+class PortfolioChannel:
+    """One portfolio's positions and the state last pushed to its clients"""
+
+    def __init__(self, portfolio_id: str, holdings: List[Dict]):
+        self.portfolio_id = portfolio_id
+        self.shares: Dict[str, float] = {}
+        for holding in holdings:
+            self.shares[holding["symbol"]] = self.shares.get(holding["symbol"], 0.0) + float(holding["shares"])
+        self.subscribers: Set["Subscriber"] = set()
+        self.state: Optional[Dict[str, Any]] = None
+        self.ts: Optional[int] = None
+        self._snapshot: Optional[str] = None
+
+    def price(self, quotes: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Per-holding and total fields from quotes (same math as the portfolio summary)"""
+        positions = {}
+        for symbol, shares in self.shares.items():
+            quote = quotes.get(symbol) or {}
+            position_value = (quote.get("current_price") or 0) * shares
+            day_change_percent = quote.get("change_percent") or 0
+            positions[symbol] = {
+                "p": quote.get("current_price") or 0,
+                "dc": position_value * (day_change_percent / 100),
+                "dcp": day_change_percent,
+                "v": position_value,
+            }
+        total_value = sum(p["v"] for p in positions.values())
+        day_change = sum(p["dc"] for p in positions.values())
+        for position in positions.values():
+            position["w"] = (position["v"] / total_value * 100) if total_value > 0 else 0
+        totals = {"v": total_value, "dc": day_change, "dcp": (day_change / total_value * 100) if total_value > 0 else 0}
+        return {
+            "h": {symbol: _rounded(fields) for symbol, fields in positions.items()},
+            "m": _rounded(totals),
+        }
+
+    def update(self, quotes: Dict[str, Dict[str, Any]], ts: int) -> Optional[str]:
+        """
+        Re-price the portfolio
+
+        Returns:
+            Encoded delta against the previous state, or None if nothing changed
+            (or there was no previous state; new clients get a snapshot)
+        """
+        state = self.price(quotes)
+        previous, self.state, self.ts = self.state, state, ts
+        if previous is None:
+            self._snapshot = None
+            return None
+        holdings = {}
+        for symbol, fields in state["h"].items():
+            changed = _changed(previous["h"].get(symbol, {}), fields)
+            if changed:
+                holdings[symbol] = changed
+        totals = _changed(previous["m"], state["m"])
+        if not holdings and not totals:
+            return None
+        self._snapshot = None
+        delta: Dict[str, Any] = {"t": "delta", "ts": ts}
+        if holdings:
+            delta["h"] = holdings
+        if totals:
+            delta["m"] = totals
+        return dumps(delta).decode()
+
+    def snapshot(self) -> Optional[str]:
+        """Encoded full state (None before the first poll), encoded once per change"""
+        if self.state is None:
+            return None
+        if self._snapshot is None:
+            self._snapshot = dumps({"t": "snapshot", "ts": self.ts, **self.state}).decode()
+        return self._snapshot
+
+
+def _rounded(fields: Dict[str, float]) -> Dict[str, float]:
+    return {key: round(float(value), FIELD_PRECISION[key]) for key, value in fields.items()}
+
+
+def _changed(previous: Dict[str, float], current: Dict[str, float]) -> Dict[str, float]:
+    return {key: value for key, value in current.items() if previous.get(key) != value}
+
+
+class Subscriber:
+    """One connected client: a bounded queue of encoded messages"""
+
+    def __init__(self, channel: PortfolioChannel, max_queue: int):
+        self.channel = channel
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.synced = False  # has been queued a snapshot
+        self.resyncs = 0
+
+    def push(self, message: str) -> bool:
+        """Queue message; False if the queue is full"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def resync(self, snapshot: str):
+        """Replace the backlog with one snapshot"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(snapshot)
+        self.resyncs += 1
+
+
+class QuoteHub:
+    """
+    Shared quote poller fanning compact deltas out to WebSocket clients
+
+    Args:
+        feed: Quote source (swap in FakeQuoteFeed for offline load tests)
+        interval: Seconds between polls
+        max_queue: Messages buffered per client before it is resynced
+        send_timeout: Seconds one send may block before the client is dropped
+    """
+
+    def __init__(self, feed: QuoteFeed, interval: float = 5.0, max_queue: int = 16, send_timeout: float = 10.0):
+        self.feed = feed
+        self.interval = interval
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self._channels: Dict[str, PortfolioChannel] = {}
+        self._quotes: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stats = {
+            "polls": 0,
+            "errors": 0,
+            "deltas": 0,
+            "sent": 0,
+            "resyncs": 0,
+            "slow_disconnects": 0,
+            "last_poll": None,
+        }
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols polled: the union over portfolios with listeners"""
+        return sorted({symbol for channel in self._channels.values() for symbol in channel.shares})
+
+    def subscribe(self, portfolio_id: str) -> Subscriber:
+        """
+        Register a client for a portfolio and start polling if needed
+
+        The client is queued the current snapshot right away when the
+        portfolio is already being polled, else after the next poll (which
+        runs immediately for a new portfolio).
+
+        Raises:
+            ValueError: Unknown or empty portfolio
+        """
+        channel = self._channels.get(portfolio_id)
+        if channel is None:
+            holdings = get_portfolio_holdings(portfolio_id)
+            if not holdings:
+                raise ValueError(f"Portfolio {portfolio_id} not found")
+            channel = self._channels[portfolio_id] = PortfolioChannel(portfolio_id, holdings)
+            self._ensure_running()
+            self._wake.set()
+        subscriber = Subscriber(channel, self.max_queue)
+        snapshot = channel.snapshot()
+        if snapshot is not None:
+            subscriber.push(snapshot)
+            subscriber.synced = True
+        channel.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a client; a portfolio without clients stops being polled"""
+        channel = subscriber.channel
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers and self._channels.get(channel.portfolio_id) is channel:
+            del self._channels[channel.portfolio_id]
+            self._prune_quotes()
+
+    def _prune_quotes(self):
+        """Forget last quotes of symbols no portfolio with listeners holds any more"""
+        watched = set(self.symbols)
+        self._quotes = {symbol: quote for symbol, quote in self._quotes.items() if symbol in watched}
+
+    def _ensure_running(self):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="quote-hub")
+
+    async def _run(self):
+        # Exits once the last portfolio loses its last client
+        while self._channels:
+            self._wake.clear()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Quote poll failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll_once(self):
+        """Fetch quotes for every watched symbol once and push changes to clients"""
+        symbols = self.symbols
+        if not symbols:
+            return
+        quotes = await self.feed.fetch(symbols)
+        # Portfolios may have lost their last client while the fetch ran
+        self._prune_quotes()
+        watched = set(self.symbols)
+        # Keep the last good quote for symbols this poll could not price
+        self._quotes.update({
+            symbol: quote for symbol, quote in quotes.items()
+            if symbol in watched and quote.get("current_price")
+        })
+        ts = int(time.time() * 1000)
+        self._stats["polls"] += 1
+        self._stats["last_poll"] = datetime.now().isoformat()
+
+        for channel in list(self._channels.values()):
+            delta = channel.update(self._quotes, ts)
+            if delta is not None:
+                self._stats["deltas"] += 1
+            for subscriber in list(channel.subscribers):
+                if not subscriber.synced:
+                    message = channel.snapshot()
+                    subscriber.synced = True
+                elif delta is not None:
+                    message = delta
+                else:
+                    continue
+                if not subscriber.push(message):
+                    subscriber.resync(channel.snapshot())
+                    self._stats["resyncs"] += 1
+
+    async def serve(self, websocket: WebSocket, subscriber: Subscriber):
+        """
+        Pump a subscriber's queue to its (accepted) socket until the client
+        disconnects or stalls, then unsubscribe it
+        """
+        sender = asyncio.create_task(self._send_loop(websocket, subscriber))
+        receiver = asyncio.create_task(self._receive_loop(websocket))
+        try:
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Before any await: a cancelled server task may not get past the next one
+            self.unsubscribe(subscriber)
+            for task in (sender, receiver):
+                task.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+        if not sender.cancelled() and isinstance(sender.exception(), asyncio.TimeoutError):
+            self._stats["slow_disconnects"] += 1
+            try:
+                await websocket.close(code=CLOSE_TOO_SLOW, reason="Client too slow")
+            except Exception:
+                pass
+
+    async def _send_loop(self, websocket: WebSocket, subscriber: Subscriber):
+        while True:
+            message = await subscriber.queue.get()
+            await asyncio.wait_for(websocket.send_text(message), timeout=self.send_timeout)
+            self._stats["sent"] += 1
+
+    @staticmethod
+    async def _receive_loop(websocket: WebSocket):
+        # Clients have nothing to say; reading is how a disconnect is noticed
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    async def stop(self):
+        """Cancel the polling loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Feed, listeners and push counters, reported in /health"""
+        return {
+            "feed": self.feed.name,
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "portfolios": len(self._channels),
+            "clients": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "symbols": len(self.symbols),
+            "quotes": len(self._quotes),
+            **self._stats,
+        }
+
+# Global hub instance
+quote_hub = QuoteHub(
+    make_feed(settings.QUOTE_FEED),
+    interval=settings.QUOTE_POLL_INTERVAL,
+    max_queue=settings.WS_SEND_QUEUE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+)
@@ -0,0 +1,148 @@
+"""
+Stock service - quotes, price history and fundamentals for individual symbols
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.cache import cache, symbol_tag
+from app.core.concurrency import MOTHERDUCK_HOST, PRICE_STORE_HOST, YAHOO_HOST, duckdb_executor, io_executor
+from app.core.config import settings
+from app.core.ttl_policy import PRICE_TTL
+from app.utils.motherduck_client import motherduck_client
+from app.utils.price_store import BAR_COLUMNS, price_store
+from app.utils.yahoo_http import yahoo_http
+from app.utils.yfinance_client import yfinance_client
+
+# Bar interval -> pandas resample rule (daily bars are stored; longer ones are built from them)
+HISTORY_INTERVALS = {"1d": None, "1wk": "W-FRI", "1mo": "ME"}
+DEFAULT_HISTORY_DAYS = 365
+MAX_QUOTE_SYMBOLS = 200
+
+
+def normalize_symbols(symbols: List[str]) -> List[str]:
+    """Upper-cased, stripped, de-duplicated symbols in request order"""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+
+class StockService:
+    """Service for single-symbol and multi-symbol stock data"""
+
+    async def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Live quotes, bypassing the quote cache
+
+        Quotes come from the async Yahoo HTTP provider; symbols it could not
+        price fall back to one multi-ticker yfinance download.
+        """
+        quotes = await yahoo_http.get_quotes(symbols) if settings.YAHOO_HTTP_ENABLED else {}
+        missing = [s for s in symbols if s not in quotes]
+        if missing:
+            quotes.update(await io_executor.run(YAHOO_HOST, yfinance_client.get_quotes, missing))
+        return quotes
+
+    @staticmethod
+    def _quote_key(symbol: str) -> str:
+        return f"quote:{symbol}"
+
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Quotes for many symbols, each cached for PRICE_TTL
+
+        Only symbols without a cached quote are fetched, in one batch, so
+        overlapping requests share entries.
+
+        Returns:
+            Dict of symbol -> {symbol, current_price, previous_close, change_percent}
+        """
+        symbols = normalize_symbols(symbols)
+        quotes: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for symbol in symbols:
+            quote = cache.get(self._quote_key(symbol))
+            if quote is None:
+                missing.append(symbol)
+            else:
+                quotes[symbol] = quote
+        if missing:
+            quotes.update(await self.refresh_quotes(missing))
+        return {symbol: quotes[symbol] for symbol in symbols}
+
+    async def refresh_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Live quotes for symbols, replacing their cached entries"""
+        fetched = await self.fetch_quotes(symbols)
+        for symbol, quote in fetched.items():
+            # A failed lookup (zero price) is not cached, so the next request retries
+            if quote.get("current_price"):
+                cache.set(self._quote_key(symbol), quote, ttl=PRICE_TTL, persist=False, tags=[symbol_tag(symbol)])
+        return fetched
+
+    async def get_stock(self, symbol: str) -> Dict[str, Any]:
+        """Quote plus daily-cached reference data (name, sector, industry, ratios)"""
+        symbol = symbol.strip().upper()
+        quotes = await self.get_quotes([symbol])
+        reference = await io_executor.run(YAHOO_HOST, yfinance_client.get_reference, symbol)
+        return {**reference, **quotes[symbol]}
+
+    async def get_history(
+        self,
+        symbol: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        interval: str = "1d",
+    ) -> Dict[str, Any]:
+        """
+        Completed-session OHLCV bars for one symbol from the local price store
+
+        The store only downloads what it does not hold yet (older history or
+        the sessions since its last update), so overlapping windows reuse
+        stored bars. Weekly and monthly bars are aggregated from daily ones.
+
+        Args:
+            symbol: Ticker symbol
+            start: First date (default: one year ago)
+            end: Last date (default: latest stored session)
+            interval: 1d, 1wk or 1mo
+
+        Returns:
+            Dict with symbol, interval and one list per column (dates, open,
+            high, low, close, adj_close, volume)
+
+        Raises:
+            ValueError: Unknown interval or start after end
+        """
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"Unknown interval '{interval}' (expected one of {', '.join(HISTORY_INTERVALS)})")
+        symbol = symbol.strip().upper()
+        start = start or date.today() - timedelta(days=DEFAULT_HISTORY_DAYS)
+        if end is not None and start > end:
+            raise ValueError("start must be on or before end")
+
+        await io_executor.run(YAHOO_HOST, price_store.update, [symbol], start)
+        bars = await io_executor.run(PRICE_STORE_HOST, price_store.bars, [symbol], start, end, update=False)
+        bars = bars.drop(columns="symbol").set_index(pd.to_datetime(bars["date"])).drop(columns="date")
+        rule = HISTORY_INTERVALS[interval]
+        if rule is not None and not bars.empty:
+            # Each aggregated bar is dated by its last session, not the period end
+            bars = bars.assign(session=bars.index).resample(rule).agg({
+                "open": "first", "high": "max", "low": "min", "close": "last", "adj_close": "last", "volume": "sum",
+                "session": "last",
+            }).dropna(subset=["close"]).set_index("session")
+
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "dates": bars.index.strftime("%Y-%m-%d").tolist(),
+            **{column: bars[column].astype(float).tolist() for column in BAR_COLUMNS if column != "date"},
+        }
+
+    async def get_fundamentals(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """MotherDuck fundamentals row for one symbol (per-symbol cache), None if there is none"""
+        symbol = symbol.strip().upper()
+        records = await duckdb_executor.run(MOTHERDUCK_HOST, motherduck_client.get_fundamentals_records, [symbol])
+        return records.get(symbol)
+
+# Global service instance
+stock_service = StockService()
@@ -0,0 +1,134 @@
+"""
+Data watermark poller - evicts cache entries derived from a MotherDuck table
+as soon as a new load lands in it, instead of waiting for their TTL
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.cache import EnhancedCache, cache, table_tag
+from app.core.concurrency import MOTHERDUCK_HOST, duckdb_executor
+from app.core.config import settings
+from app.utils.motherduck_client import MotherDuckClient, motherduck_client
+
+# Table -> query returning the table's data watermark (changes whenever new data lands)
+WATERMARK_QUERIES = {
+    "OBQ_Scores": "SELECT MAX(calculation_date) FROM my_db.main.OBQ_Scores",
+    "StockDataYfinance4Streamlit": "SELECT MAX(last_updated) FROM my_db.main.StockDataYfinance4Streamlit",
+}
+
+WATERMARK_TTL = 30 * 24 * 3600  # remembered watermarks outlive any entry they guard
+
+
+class WatermarkPoller:
+    """Polls table watermarks and invalidates the table's cache tag when one moves"""
+
+    def __init__(
+        self,
+        client: MotherDuckClient,
+        cache: EnhancedCache,
+        queries: Dict[str, str],
+        interval: int = 300,
+    ):
+        self.client = client
+        self.cache = cache
+        self.queries = dict(queries)
+        self.interval = interval
+        self._seen: Dict[str, Optional[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._status: Dict[str, Any] = {
+            "state": "idle",
+            "polls": 0,
+            "invalidations": 0,
+            "watermarks": {},
+            "errors": {},
+            "last_poll": None,
+        }
+
+    async def start(self):
+        """Start polling in the background (returns immediately)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever(), name="watermark-poller")
+
+    async def stop(self):
+        """Cancel the polling loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._status["state"] = "stopped"
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Watermark poll failed: {e}")
+            self._status["state"] = "sleeping"
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def _watermark_key(table: str) -> str:
+        return f"watermark:{table}"
+
+    async def poll_once(self) -> Dict[str, bool]:
+        """
+        Check every table once
+
+        Returns:
+            Table -> whether its entries were invalidated
+        """
+        self._status["state"] = "polling"
+        changed = {}
+        for table, query in self.queries.items():
+            try:
+                watermark = await duckdb_executor.run(MOTHERDUCK_HOST, self.client.get_watermark, query)
+            except Exception as e:
+                self._status["errors"][table] = str(e)
+                print(f"Could not read watermark for {table}: {e}")
+                continue
+            self._status["errors"].pop(table, None)
+            # Off the event loop: invalidating scans the disk tier (every file with the files backend)
+            changed[table] = await asyncio.to_thread(self._apply, table, watermark)
+
+        self._status["polls"] += 1
+        self._status["last_poll"] = datetime.now().isoformat()
+        self._status["state"] = "idle"
+        return changed
+
+    def _apply(self, table: str, watermark: Optional[str]) -> bool:
+        """Invalidate the table's entries if its watermark moved since this worker last looked (runs on a worker thread)"""
+        key = self._watermark_key(table)
+        persisted = self.cache.get_persisted(key)
+        # Start from the last watermark any worker recorded, so loads that landed
+        # while the service was down are caught on the first poll
+        previous = self._seen.get(table, persisted)
+        self._seen[table] = watermark
+        self._status["watermarks"][table] = watermark
+        if watermark is None or watermark == previous:
+            return False
+
+        # Another worker sharing the disk tier may already have cleared it for this watermark
+        disk_done = persisted == watermark
+        removed = self.cache.invalidate_tags([table_tag(table)], persisted=not disk_done)
+        if not disk_done:
+            self.cache.set(key, watermark, ttl=WATERMARK_TTL, persist=True)
+        self._status["invalidations"] += 1
+        print(f"New data in {table} (watermark {previous} -> {watermark}): invalidated {removed} cache entries")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Last seen watermarks and poll state, reported in /health"""
+        return {**self._status, "watermarks": dict(self._status["watermarks"]), "errors": dict(self._status["errors"])}
+
+# Global poller instance
+watermark_poller = WatermarkPoller(
+    motherduck_client,
+    cache,
+    WATERMARK_QUERIES,
+    interval=settings.WATERMARK_POLL_INTERVAL,
+)
@@ -2,37 +2,70 @@
 MotherDuck database client
 """
 
-import duckdb
+import math
 import os
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
 import pandas as pd
-from app.core.cache import cache
+from app.core.cache import cache, symbol_tag, table_tag
+from app.core.metrics import cache_metrics
+from app.core.ttl_policy import FUNDAMENTALS_TTL
+from app.utils.motherduck_pool import MotherDuckPool, motherduck_pool
+
+# Fundamentals are cached per symbol so overlapping portfolios share entries,
+# until the watermark poller sees a new OBQ/GuruFocus load (FUNDAMENTALS_TTL is a backstop)
+FUNDAMENTALS_MISSING_TTL = 3600  # symbols with no row (ETFs etc.) are re-checked hourly
+FUNDAMENTALS_TABLES = ("OBQ_Scores", "gurufocus_with_momentum")
+
+def _to_native(value: Any) -> Any:
+    """Convert numpy/pandas scalars to plain Python values (NaN/NaT -> None)"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
 
 class MotherDuckClient:
     """Client for connecting to MotherDuck database"""
     
-    def __init__(self):
+    def __init__(self, pool: MotherDuckPool = motherduck_pool):
         self.token = os.getenv('MOTHERDUCK_TOKEN')
         if not self.token:
             raise ValueError("MOTHERDUCK_TOKEN environment variable not set")
-        self._conn = None
+        self.pool = pool
     
     def get_connection(self):
-        """Get or create MotherDuck connection"""
-        if self._conn is None:
-            self._conn = duckdb.connect(f'md:?motherduck_token={self.token}')
-        return self._conn
+        """The pool's parent MotherDuck connection (queries go through cursors)"""
+        return self.pool.get_connection()
     
     def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute a query and return results as DataFrame"""
-        conn = self.get_connection()
-        result = conn.execute(query).df()
-        return result
+        """
+        Execute a query and return results as DataFrame
+        
+        Runs on this thread's pooled cursor in one of the pool's slots, so
+        threads of the DuckDB executor (or any other caller) query in
+        parallel up to MOTHERDUCK_MAX_CONCURRENCY.
+        """
+        with self.pool.connection() as cursor:
+            return cursor.execute(query).df()
+    
+    def get_watermark(self, query: str) -> Optional[str]:
+        """Run a single-value watermark query (e.g. MAX(calculation_date)), as a string"""
+        result = self.execute_query(query)
+        if result.empty:
+            return None
+        value = _to_native(result.iloc[0, 0])
+        return None if value is None else str(value)
     
     def get_fundamentals(self, tickers: list) -> Optional[pd.DataFrame]:
         """
         Fetch fundamental metrics from MotherDuck for given tickers.
-        Cached for 24 hours since fundamentals update daily.
+        Cached per symbol until the next nightly data load.
         
         Args:
             tickers: List of stock ticker symbols
@@ -40,22 +73,54 @@ class MotherDuckClient:
         Returns:
             DataFrame with fundamental metrics or None if no data found
         """
-        if not tickers:
+        records = self.get_fundamentals_records(tickers)
+        if not records:
             return None
+        return pd.DataFrame([records[t] for t in sorted(records)])
+    
+    def get_fundamentals_records(self, tickers: list) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch fundamentals as plain-Python records keyed by symbol.
+        
+        Each symbol is cached separately, so a request for N tickers only
+        queries MotherDuck (in a single IN query) for the ones not cached yet.
         
+        Args:
+            tickers: List of stock ticker symbols
+            
+        Returns:
+            Dict of symbol -> fundamentals row; symbols without data are omitted
+        """
         # Filter and format tickers
-        valid_tickers = [t.strip().upper() for t in tickers if t and t.strip()]
+        valid_tickers = list(dict.fromkeys(t.strip().upper() for t in tickers or [] if t and t.strip()))
         if not valid_tickers:
-            return None
+            return {}
         
-        # Check cache first (24 hour TTL)
-        cache_key = f"motherduck:fundamentals:{','.join(sorted(valid_tickers))}"
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
+        # Check per-symbol cache first; an empty record means "no data for this symbol"
+        records: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for ticker in valid_tickers:
+            record = cache.get(self._fundamentals_key(ticker))
+            if record is None:
+                missing.append(ticker)
+            elif record:
+                records[ticker] = record
+        
+        if missing:
+            print(f"MotherDuck cache MISS for {len(missing)}/{len(valid_tickers)} tickers - querying database")
+            records.update(self._fetch_fundamentals(missing))
+        else:
             print(f"MotherDuck cache HIT for {len(valid_tickers)} tickers")
-            return cached_result
         
-        symbols_str = "', '".join(valid_tickers)
+        return records
+    
+    @staticmethod
+    def _fundamentals_key(ticker: str) -> str:
+        return f"motherduck:fundamentals:{ticker}"
+    
+    def _fetch_fundamentals(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Query fundamentals for tickers in one IN query and cache each symbol separately"""
+        symbols_str = "', '".join(t.replace("'", "''") for t in tickers)
         
         query = f"""
         WITH latest_obq AS (
@@ -106,22 +171,29 @@ class MotherDuckClient:
         ORDER BY gf.Symbol
         """
         
-        print(f"MotherDuck cache MISS - querying database for {len(valid_tickers)} tickers")
+        started = time.perf_counter()
         result = self.execute_query(query)
+        cache_metrics.observe_latency(self._fundamentals_key("batch"), time.perf_counter() - started)
         
-        if result.empty:
-            return None
+        records = {}
+        for row in result.to_dict(orient="records"):
+            record = {column: _to_native(value) for column, value in row.items()}
+            records[record["Symbol"]] = record
         
-        # Cache for 24 hours (86400 seconds) with disk persistence
-        cache.set(cache_key, result, ttl=86400, persist=True)
+        # Cache until the next data load with disk persistence
+        table_tags = [table_tag(table) for table in FUNDAMENTALS_TABLES]
+        for ticker in tickers:
+            tags = [symbol_tag(ticker), *table_tags]
+            if ticker in records:
+                cache.set(self._fundamentals_key(ticker), records[ticker], ttl=FUNDAMENTALS_TTL, persist=True, tags=tags)
+            else:
+                cache.set(self._fundamentals_key(ticker), {}, ttl=FUNDAMENTALS_MISSING_TTL, persist=True, tags=tags)
         
-        return result
+        return records
     
     def close(self):
-        """Close the connection"""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        """Close the pool's connection (per-thread cursors are re-created on next use)"""
+        self.pool.close()
 
 # Global client instance
 motherduck_client = MotherDuckClient()
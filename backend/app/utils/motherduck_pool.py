@@ -0,0 +1,277 @@
+"""
+Thread-safe MotherDuck connection manager, shared by the backend and the
+Streamlit pages
+
+A DuckDB connection must not be used by two threads at once, so one shared
+connection either serializes every query or corrupts state under concurrent
+sessions. The pool keeps ONE parent connection per process (one MotherDuck
+attach and auth handshake) and hands each thread its own cursor on it;
+cursors are independent connections to the same database, so queries from
+different threads run in parallel:
+
+    with motherduck_pool.connection() as cursor:       # holds a slot
+        df = cursor.execute("SELECT ...").df()
+
+    cursor = motherduck_pool.cursor()                   # drop-in connection object
+    df = cursor.execute("SELECT ...").df()              # a slot per statement, result
+                                                        # fetched before it is released
+
+At most max_concurrency statements run at a time (further checkouts wait up
+to checkout_timeout). A checkout on a connection idle for longer than
+health_check_interval first runs SELECT 1; if that fails, or a query fails
+with a connection/IO error, the parent connection is replaced and every
+thread's cursor is re-created on its next checkout.
+
+This module only depends on duckdb (and pandas, for results) so the Streamlit
+pages can load it directly; the token and limits come from the
+MOTHERDUCK_TOKEN, MOTHERDUCK_MAX_CONCURRENCY, MOTHERDUCK_CHECKOUT_TIMEOUT and
+MOTHERDUCK_HEALTH_CHECK_INTERVAL environment variables.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import duckdb
+
+# Errors after which the parent connection is assumed broken
+CONNECTION_ERRORS = (duckdb.ConnectionException, duckdb.IOException)
+
+DEFAULT_DATABASE = "md:"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_CHECKOUT_TIMEOUT = 30.0  # seconds waiting for a free slot
+DEFAULT_HEALTH_CHECK_INTERVAL = 60.0  # seconds idle before a checkout pings first
+
+
+class MotherDuckPool:
+    """
+    One parent MotherDuck connection, per-thread cursors, bounded concurrency
+
+    Args:
+        token: MotherDuck token (default: MOTHERDUCK_TOKEN, read at connect time)
+        database: Database to attach ("md:" for the default MotherDuck database)
+        max_concurrency: Statements allowed to run at once
+        checkout_timeout: Seconds a checkout waits for a slot before TimeoutError
+        health_check_interval: Idle seconds after which a checkout runs SELECT 1
+        connect: Connection factory (duckdb.connect)
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        database: str = DEFAULT_DATABASE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        connect: Callable[..., duckdb.DuckDBPyConnection] = duckdb.connect,
+    ):
+        self.token = token
+        self.database = database
+        self.max_concurrency = max_concurrency
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._generation = 0  # bumped on every reconnect; stale cursors are replaced
+        self._local = threading.local()
+        self._stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "health_checks": 0, "reconnects": 0, "failures": 0}
+        self._active = 0
+
+    def _open(self) -> duckdb.DuckDBPyConnection:
+        token = self.token or os.getenv("MOTHERDUCK_TOKEN")
+        if not token:
+            raise ValueError("MOTHERDUCK_TOKEN environment variable not set")
+        # Replacement scans (SELECT * FROM df) look up DataFrames in the caller's
+        # frames, not just the innermost one, so wrapped cursors stay transparent
+        return self._connect(f"{self.database}?motherduck_token={token}", config={"python_scan_all_frames": True})
+
+    def _current(self):
+        """(parent connection, generation), opening the connection if needed"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+                self._generation += 1
+            return self._conn, self._generation
+
+    def get_connection(self) -> duckdb.DuckDBPyConnection:
+        """The parent connection (opened on first use). Prefer cursor()/connection() for queries."""
+        return self._current()[0]
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _invalidate(self, generation: int):
+        """Drop the parent connection if it is still the given generation"""
+        with self._lock:
+            if self._conn is not None and self._generation == generation:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+                self._stats["reconnects"] += 1
+
+    def _thread_cursor(self) -> duckdb.DuckDBPyConnection:
+        """This thread's cursor on the current parent connection, health-checked if idle"""
+        conn, generation = self._current()
+        local = self._local
+        if getattr(local, "generation", None) != generation:
+            local.cursor = conn.cursor()
+            local.generation = generation
+            local.last_used = time.monotonic()
+        elif time.monotonic() - local.last_used > self.health_check_interval:
+            self._count("health_checks")
+            try:
+                local.cursor.execute("SELECT 1").fetchone()
+            except duckdb.Error as e:
+                print(f"MotherDuck health check failed, reconnecting: {e}")
+                self._invalidate(generation)
+                conn, local.generation = self._current()
+                local.cursor = conn.cursor()
+        return local.cursor
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Check out this thread's cursor for the duration of the block
+
+        Holds one of max_concurrency slots; a connection/IO error inside the
+        block marks the parent connection broken so the next checkout
+        reconnects.
+
+        Raises:
+            TimeoutError: No slot freed up within checkout_timeout
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                self._count("timeouts")
+                raise TimeoutError(f"No MotherDuck connection slot free within {self.checkout_timeout}s")
+        try:
+            with self._lock:
+                self._stats["checkouts"] += 1
+                self._active += 1
+            cursor = self._thread_cursor()
+            generation = self._local.generation
+            try:
+                yield cursor
+            except CONNECTION_ERRORS:
+                self._count("failures")
+                self._invalidate(generation)
+                raise
+            finally:
+                self._local.last_used = time.monotonic()
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+    def execute(self, query: str, parameters: Optional[Any] = None) -> "QueryResult":
+        """
+        Run one statement and fetch its result, both inside one slot
+
+        Fetching inside the slot keeps result transfer under max_concurrency,
+        and a connection/IO error while fetching still replaces the parent.
+
+        Returns:
+            QueryResult (.df(), .fetchdf(), .fetchall(), .fetchone())
+        """
+        with self.connection() as cursor:
+            return QueryResult(cursor.execute(query, parameters).df())
+
+    def cursor(self) -> "PooledCursor":
+        """Connection-like object whose execute() takes a slot per statement"""
+        return PooledCursor(self)
+
+    def close(self):
+        """Close the parent connection (the next checkout reconnects)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connected": self._conn is not None,
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                **self._stats,
+            }
+
+
+class QueryResult:
+    """
+    A statement's result, fetched as a DataFrame while its slot was held
+
+    fetchall()/fetchone() read rows back from that frame, so values carry
+    pandas dtypes (e.g. an integer column with NULLs comes back as floats).
+    """
+
+    def __init__(self, frame):
+        self._frame = frame
+        self._rows: Optional[List[tuple]] = None
+        self._position = 0
+
+    def df(self):
+        return self._frame
+
+    fetchdf = df
+
+    def _all_rows(self) -> List[tuple]:
+        if self._rows is None:
+            values = self._frame.astype(object).where(self._frame.notna(), None)
+            self._rows = list(values.itertuples(index=False, name=None))
+        return self._rows
+
+    def fetchall(self) -> List[tuple]:
+        """Rows not fetched yet (NULLs as None)"""
+        rows = self._all_rows()[self._position:]
+        self._position += len(rows)
+        return rows
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self._all_rows()
+        if self._position >= len(rows):
+            return None
+        self._position += 1
+        return rows[self._position - 1]
+
+
+class PooledCursor:
+    """
+    Drop-in for a shared duckdb connection: execute() and every other method
+    run on the calling thread's cursor inside a pool slot; plain attributes
+    are read from that thread's cursor without one
+    """
+
+    def __init__(self, pool: MotherDuckPool):
+        self._pool = pool
+
+    def execute(self, query: str, parameters: Optional[Any] = None) -> QueryResult:
+        return self._pool.execute(query, parameters)
+
+    def __getattr__(self, name: str) -> Any:
+        # AttributeError for names a duckdb connection does not have
+        if not callable(getattr(duckdb.DuckDBPyConnection, name)):
+            return getattr(self._pool._thread_cursor(), name)
+
+        def method(*args, **kwargs):
+            with self._pool.connection() as cursor:
+                return getattr(cursor, name)(*args, **kwargs)
+        method.__name__ = name
+        return method
+
+
+# Global pool (one parent connection per process)
+motherduck_pool = MotherDuckPool(
+    max_concurrency=int(os.getenv("MOTHERDUCK_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))),
+    checkout_timeout=float(os.getenv("MOTHERDUCK_CHECKOUT_TIMEOUT", str(DEFAULT_CHECKOUT_TIMEOUT))),
+    health_check_interval=float(os.getenv("MOTHERDUCK_HEALTH_CHECK_INTERVAL", str(DEFAULT_HEALTH_CHECK_INTERVAL))),
+)
@@ -0,0 +1,130 @@
+"""
+Vectorized portfolio NAV engine
+
+Portfolio value over time is a price matrix (trading days x symbols) times a
+share vector. Benchmarks are joined onto the portfolio's trading-day index
+and forward-filled, so every point lines up by date rather than by position.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+
+def price_matrix(data: pd.DataFrame, symbols: Iterable[str], field: str = "Adj Close") -> pd.DataFrame:
+    """
+    Extract a (date x symbol) price matrix from a yfinance download
+
+    Handles column-grouped (field, symbol), ticker-grouped (symbol, field) and
+    flat single-symbol frames, and falls back to "Close" when the download was
+    auto-adjusted (no "Adj Close" column).
+
+    Args:
+        data: Result of yf.download
+        symbols: Symbols requested, in the order wanted for columns
+        field: Price field to use
+
+    Returns:
+        DataFrame indexed by date with one column per symbol that has data
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if data is None or data.empty:
+        return pd.DataFrame(columns=symbols, dtype=float)
+
+    columns = data.columns
+    if isinstance(columns, pd.MultiIndex):
+        fields = set(columns.get_level_values(0))
+        if field not in fields and "Close" in fields:
+            field = "Close"
+        if field in fields:
+            prices = data[field]
+        else:
+            # group_by="ticker": symbols on the first level
+            inner = set(columns.get_level_values(1))
+            if field not in inner:
+                field = "Close"
+            prices = data.xs(field, axis=1, level=1)
+    else:
+        if field not in columns:
+            field = "Close"
+        prices = data[[field]].set_axis(symbols[:1], axis=1)
+
+    prices = prices.reindex(columns=[s for s in symbols if s in prices.columns])
+    return prices.astype(float).sort_index()
+
+
+def compute_nav(prices: pd.DataFrame, shares: pd.Series) -> pd.Series:
+    """
+    Share-weighted portfolio value for every trading day
+
+    Gaps in a symbol's prices (halts, holidays on its exchange) carry the last
+    price forward; before a symbol's first price it contributes nothing.
+    Days on which the portfolio has no value at all are dropped.
+
+    Args:
+        prices: (date x symbol) price matrix
+        shares: Shares held per symbol
+
+    Returns:
+        NAV series indexed by date
+    """
+    shares = shares.groupby(level=0).sum()
+    held = [s for s in shares.index if s in prices.columns]
+    if not held or prices.empty:
+        return pd.Series(dtype=float)
+    values = prices[held].ffill().fillna(0.0).to_numpy() @ shares[held].to_numpy(dtype=float)
+    nav = pd.Series(values, index=prices.index)
+    return nav[nav > 0]
+
+
+def normalize(series: pd.Series, base: float = 100.0) -> pd.Series:
+    """Rebase a series so its first valid value equals base"""
+    valid = series.dropna()
+    if valid.empty or valid.iloc[0] == 0:
+        return series * float("nan")
+    return series / valid.iloc[0] * base
+
+
+def align_to_index(index: pd.Index, benchmarks: Dict[str, pd.Series]) -> pd.DataFrame:
+    """
+    Join benchmark series onto a trading-day index
+
+    Each benchmark is reindexed on the union of dates, forward-filled, then
+    restricted to index, so a day the benchmark did not trade takes its last
+    close instead of shifting every later point.
+
+    Returns:
+        DataFrame indexed by index with one column per benchmark
+    """
+    aligned = {}
+    for name, series in benchmarks.items():
+        series = series.dropna().sort_index()
+        if series.index.has_duplicates:
+            series = series[~series.index.duplicated(keep="last")]
+        union = series.index.union(index)
+        aligned[name] = series.reindex(union).ffill().reindex(index)
+    return pd.DataFrame(aligned, index=index)
+
+
+def performance_frame(
+    prices: pd.DataFrame,
+    shares: pd.Series,
+    benchmarks: Optional[Dict[str, pd.Series]] = None,
+) -> pd.DataFrame:
+    """
+    Portfolio NAV plus benchmarks rebased to 100, on the portfolio's trading days
+
+    Leading days before every benchmark has a price are dropped so all
+    series start together.
+
+    Returns:
+        DataFrame with a "portfolio" column (NAV) and one normalized column per benchmark
+    """
+    nav = compute_nav(prices, shares)
+    frame = align_to_index(nav.index, benchmarks or {})
+    # A benchmark with no data at all is left out rather than emptying the frame
+    frame = frame.dropna(axis=1, how="all").dropna()
+    if len(frame.columns):
+        frame = frame.apply(normalize)
+    frame.insert(0, "portfolio", nav.reindex(frame.index))
+    return frame
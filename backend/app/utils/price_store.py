@@ -0,0 +1,351 @@
+"""
+Local incremental store of daily price bars, shared by the backend and the
+Streamlit pages
+
+Bars live in one Parquet file per symbol and are range-scanned with DuckDB:
+
+    <root>/bars/symbol=<SYMBOL>/bars.parquet   date, open, high, low, close, adj_close, volume
+    <root>/bars/symbol=<SYMBOL>/meta.json      {"covered_from": ..., "last_date": ..., "checked_on": ...}
+
+Only completed sessions are stored (downloads end before today). On the
+first request a symbol's history is downloaded once; afterwards a symbol is
+refreshed at most once a day with a small delta download starting a few
+days before its last stored bar, batched across symbols. If the overlap
+shows the adjusted closes moved (a dividend or split was applied), that
+symbol's history is re-downloaded.
+
+Files are written to a temp name and renamed into place, so any number of
+processes can share a store directory. This module only depends on duckdb,
+pandas and yfinance (no backend settings) so the Streamlit app can load it
+directly; the location comes from the PRICE_STORE_DIR environment variable.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import duckdb
+import pandas as pd
+import yfinance as yf
+
+BAR_COLUMNS = ["date", "open", "high", "low", "close", "adj_close", "volume"]
+YF_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Adj Close": "adj_close", "Volume": "volume"}
+
+DEFAULT_STORE_DIR = "/tmp/jcn_price_store"
+OVERLAP_DAYS = 7  # delta downloads re-read this many days to detect adjustments
+ADJUSTMENT_TOLERANCE = 1e-4  # relative change in adj_close that triggers a full re-download
+
+PERIOD_DAYS = {
+    "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731,
+    "5y": 5 * 366, "10y": 10 * 366, "20y": 20 * 366,
+}
+
+
+def period_start(period: str, today: Optional[date] = None) -> date:
+    """First date covered by a yfinance-style period ("6mo", "1y", "ytd", ...)"""
+    today = today or date.today()
+    if period == "ytd":
+        return date(today.year, 1, 1)
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return today - timedelta(days=PERIOD_DAYS[period])
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _last_session(today: date) -> date:
+    """Latest weekday before today: the newest completed session a download can return (holidays aside)"""
+    day = today - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _ticker_frame(data: pd.DataFrame, symbol: str, single: bool) -> pd.DataFrame:
+    """Columns of one symbol from a group_by='ticker' download"""
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        return data[symbol]
+    return data if single else pd.DataFrame()
+
+
+def _to_bars(frame: pd.DataFrame) -> pd.DataFrame:
+    """yfinance OHLCV frame -> store columns, one row per completed session"""
+    if frame.empty or "Close" not in frame:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    bars = frame.rename(columns=YF_COLUMNS)
+    if "adj_close" not in bars:
+        bars["adj_close"] = bars["close"]
+    bars = bars.dropna(subset=["close"])
+    index = pd.DatetimeIndex(bars.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    bars = bars.assign(date=index.normalize().date)
+    return bars.reindex(columns=BAR_COLUMNS).reset_index(drop=True)
+
+
+class PriceStore:
+    """Per-symbol Parquet store of daily bars with incremental yfinance updates"""
+
+    def __init__(self, root_dir: str, overlap_days: int = OVERLAP_DAYS):
+        self.root_dir = Path(root_dir)
+        self.bars_dir = self.root_dir / "bars"
+        self.bars_dir.mkdir(parents=True, exist_ok=True)
+        self.overlap_days = overlap_days
+        self._lock = threading.Lock()  # guards update planning and the lock table
+        self._symbol_locks: Dict[str, threading.Lock] = {}  # one writer per symbol
+
+    def _symbol_dir(self, symbol: str) -> Path:
+        return self.bars_dir / f"symbol={quote(symbol, safe='')}"
+
+    def _bars_path(self, symbol: str) -> Path:
+        return self._symbol_dir(symbol) / "bars.parquet"
+
+    def _read_meta(self, symbol: str) -> dict:
+        try:
+            with open(self._symbol_dir(symbol) / "meta.json", "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol: str, meta: dict):
+        path = self._symbol_dir(symbol) / "meta.json"
+        tmp_path = path.with_name(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _read_symbol(self, symbol: str) -> pd.DataFrame:
+        path = self._bars_path(symbol)
+        if not path.exists():
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        with duckdb.connect() as conn:
+            bars = conn.execute(f"SELECT {', '.join(BAR_COLUMNS)} FROM read_parquet(?) ORDER BY date", [str(path)]).df()
+        bars["date"] = bars["date"].dt.date
+        return bars
+
+    def _write_symbol(self, symbol: str, bars: pd.DataFrame):
+        path = self._bars_path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"bars.parquet.{os.getpid()}.{threading.get_ident()}.tmp")
+        with duckdb.connect() as conn:
+            conn.register("bars", bars)
+            conn.execute(
+                f"COPY (SELECT DISTINCT ON (date) {', '.join(BAR_COLUMNS)} FROM bars ORDER BY date) "
+                f"TO '{tmp_path}' (FORMAT PARQUET)"
+            )
+        os.replace(tmp_path, path)
+
+    def update(self, symbols: Iterable[str], start: date) -> Dict[str, int]:
+        """
+        Make sure every symbol has completed sessions from start up to yesterday
+
+        Symbols already checked today are skipped. The rest are fetched in as
+        few multi-ticker downloads as possible: one for symbols that need
+        history before what is stored, one per distinct delta start otherwise.
+        Downloads run without holding the store lock; only each symbol's
+        write is serialized, so one cold download does not hold up updates
+        of other symbols.
+
+        Returns:
+            Dict of symbol -> number of new bars written
+        """
+        today = date.today()
+        start = _as_date(start)
+        with self._lock:
+            plans = self._plan(symbols, start, today)
+
+        written: Dict[str, int] = {}
+        refetch: List[str] = []
+        for fetch_from, group in sorted(plans.items()):
+            data = self._download(group, fetch_from, today)
+            if data is None:
+                continue  # download failed; try again on the next request
+            for symbol in group:
+                new_bars = _to_bars(_ticker_frame(data, symbol, len(group) == 1))
+                with self._symbol_lock(symbol):
+                    added = self._apply(symbol, new_bars, fetch_from, start, today)
+                if added is None:
+                    refetch.append(symbol)
+                else:
+                    written[symbol] = added
+
+        # Adjusted closes moved (dividend/split): re-download full history
+        if refetch:
+            covered = {s: date.fromisoformat(self._read_meta(s)["covered_from"]) for s in refetch}
+            since = min(covered.values())
+            data = self._download(refetch, since, today)
+            if data is not None:
+                for symbol in refetch:
+                    bars = _to_bars(_ticker_frame(data, symbol, len(refetch) == 1))
+                    bars = bars[bars["date"] >= covered[symbol]]
+                    with self._symbol_lock(symbol):
+                        written[symbol] = self._merge(
+                            symbol, pd.DataFrame(columns=BAR_COLUMNS), bars, self._read_meta(symbol), covered[symbol], today
+                        )
+        return written
+
+    def _plan(self, symbols: Iterable[str], start: date, today: date) -> Dict[date, List[str]]:
+        """Fetch start -> symbols to download from it (symbols checked today are left out)"""
+        plans: Dict[date, List[str]] = {}
+        for symbol in dict.fromkeys(symbols):
+            meta = self._read_meta(symbol)
+            covered_from = meta.get("covered_from")
+            if covered_from is not None and date.fromisoformat(covered_from) <= start:
+                if meta.get("checked_on") == today.isoformat():
+                    continue
+                last_date = meta.get("last_date")
+                fetch_from = date.fromisoformat(last_date) - timedelta(days=self.overlap_days) if last_date else start
+            else:
+                fetch_from = start
+            plans.setdefault(fetch_from, []).append(symbol)
+        return plans
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def _apply(self, symbol: str, new_bars: pd.DataFrame, fetch_from: date, start: date, today: date) -> Optional[int]:
+        """
+        Merge downloaded bars into the symbol's stored history (under its lock)
+
+        Metadata is re-read here, so a concurrent update of the same symbol is
+        never overwritten with a stale view.
+
+        Returns:
+            Number of new bars, or None if adjusted closes moved and the full
+            history has to be downloaded again
+        """
+        meta = self._read_meta(symbol)
+        full = "covered_from" not in meta or date.fromisoformat(meta["covered_from"]) > start
+        old_bars = pd.DataFrame(columns=BAR_COLUMNS) if full and fetch_from <= start else self._read_symbol(symbol)
+        if not full and self._adjusted_since(old_bars, new_bars):
+            return None
+        return self._merge(symbol, old_bars, new_bars, meta, min(fetch_from, start), today)
+
+    @staticmethod
+    def _download(symbols: List[str], start: date, end: date) -> Optional[pd.DataFrame]:
+        """One multi-ticker download of completed sessions in [start, end)"""
+        if start >= end:
+            return pd.DataFrame()
+        try:
+            print(f"Price store: downloading {len(symbols)} symbols since {start}")
+            return yf.download(
+                symbols, start=start.isoformat(), end=end.isoformat(), interval="1d",
+                group_by="ticker", auto_adjust=False, actions=False, progress=False, threads=True,
+            )
+        except Exception as e:
+            print(f"Price store download failed: {e}")
+            return None
+
+    @staticmethod
+    def _adjusted_since(old_bars: pd.DataFrame, new_bars: pd.DataFrame) -> bool:
+        """Whether overlapping days show a different adjusted close than stored"""
+        if old_bars.empty or new_bars.empty:
+            return False
+        overlap = old_bars.merge(new_bars, on="date", suffixes=("_old", "_new"))
+        if overlap.empty:
+            return False
+        change = (overlap["adj_close_new"] / overlap["adj_close_old"] - 1).abs()
+        return bool((change > ADJUSTMENT_TOLERANCE).any())
+
+    def _merge(self, symbol: str, old_bars: pd.DataFrame, new_bars: pd.DataFrame, meta: dict, covered_from: date, today: date) -> int:
+        """
+        Write old + new bars (new wins on overlapping dates) and update the symbol's metadata
+
+        yfinance reports many failures as an empty (or all-NaN) frame instead
+        of raising. If no bars came back, covered_from is never widened, and
+        unless the stored history already reaches the last completed session
+        nothing is recorded, so the next request retries instead of skipping
+        the symbol for the rest of the day.
+        """
+        if new_bars.empty:
+            last_date = meta.get("last_date")
+            if last_date is None or date.fromisoformat(last_date) < _last_session(today):
+                print(f"Price store: no bars returned for {symbol}, will retry")
+                return 0
+            # Already up to date: mark it checked, but an empty download proves no wider coverage
+            self._write_meta(symbol, {**meta, "checked_on": today.isoformat()})
+            return 0
+        added = len(new_bars)
+        if not old_bars.empty:
+            added = int((~new_bars["date"].isin(set(old_bars["date"]))).sum())
+        parts = [frame for frame in (new_bars, old_bars) if not frame.empty]
+        self._write_symbol(symbol, pd.concat(parts, ignore_index=True))
+        dates = [d for frame in parts for d in (frame["date"].min(), frame["date"].max())]
+        previous_from = meta.get("covered_from")
+        meta = {
+            # A symbol listed after start is still fully covered from start
+            "covered_from": min(covered_from, date.fromisoformat(previous_from)).isoformat() if previous_from else covered_from.isoformat(),
+            "last_date": max(dates).isoformat() if dates else meta.get("last_date"),
+            "checked_on": today.isoformat(),
+        }
+        self._write_meta(symbol, meta)
+        return added
+
+    def bars(self, symbols: Iterable[str], start: date, end: Optional[date] = None, update: bool = True) -> pd.DataFrame:
+        """
+        Daily bars for symbols between start and end (inclusive), long format
+
+        Args:
+            symbols: Ticker symbols
+            start: First date wanted
+            end: Last date wanted (default: everything stored)
+            update: Fetch missing history / today's delta first
+
+        Returns:
+            DataFrame with a symbol column plus BAR_COLUMNS, sorted by symbol and date
+        """
+        symbols = list(dict.fromkeys(symbols))
+        start = _as_date(start)
+        if update:
+            self.update(symbols, start)
+        paths = {str(self._bars_path(s)): s for s in symbols if self._bars_path(s).exists()}
+        if not paths:
+            return pd.DataFrame(columns=["symbol"] + BAR_COLUMNS)
+        end = _as_date(end) if end is not None else date.max
+        with duckdb.connect() as conn:
+            bars = conn.execute(
+                f"SELECT filename, {', '.join(BAR_COLUMNS)} FROM read_parquet(?, filename=true) "
+                f"WHERE date BETWEEN ? AND ? ORDER BY filename, date",
+                [list(paths), start, end],
+            ).df()
+        bars.insert(0, "symbol", bars.pop("filename").map(paths))
+        return bars
+
+    def prices(
+        self,
+        symbols: Iterable[str],
+        start: date,
+        end: Optional[date] = None,
+        field: str = "adj_close",
+        update: bool = True,
+    ) -> pd.DataFrame:
+        """
+        (date x symbol) matrix of one price field between start and end (update as for bars())
+
+        Returns:
+            DataFrame indexed by Timestamp, columns in the order of symbols that have data
+        """
+        symbols = list(dict.fromkeys(symbols))
+        bars = self.bars(symbols, start, end, update=update)
+        if bars.empty:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        matrix = bars.pivot(index="date", columns="symbol", values=field)
+        matrix.index = pd.to_datetime(matrix.index)
+        matrix.columns.name = None
+        return matrix.reindex(columns=[s for s in symbols if s in matrix.columns]).astype(float)
+
+# Global store (shared by every process pointing at the same directory)
+price_store = PriceStore(os.getenv("PRICE_STORE_DIR", DEFAULT_STORE_DIR))
@@ -0,0 +1,85 @@
+"""
+Vectorized risk/return metrics for a portfolio NAV series
+
+Everything is computed with NumPy from the NAV values and their dates in a
+single pass over the array (a few microseconds for a year of daily data),
+so it can run on every summary without extra fetches.
+"""
+
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _pct(value: float) -> Optional[float]:
+    return float(value * 100) if np.isfinite(value) else None
+
+
+def _ratio(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def risk_metrics(
+    dates: Sequence[str],
+    values: Sequence[float],
+    risk_free_rate: float = 0.0,
+    as_of: Optional[date] = None,
+) -> Dict[str, Optional[float]]:
+    """
+    Returns, volatility, Sharpe/Sortino and max drawdown from a NAV series
+
+    Args:
+        dates: ISO dates (YYYY-MM-DD), ascending, one per NAV value
+        values: Portfolio NAV per date
+        risk_free_rate: Annual risk-free rate as a fraction (e.g. 0.04)
+        as_of: Reference date for the YTD window (defaults to the last date)
+
+    Returns:
+        Dict with ytd_return_percent, one_year_return_percent, volatility
+        (annualized, percent), sharpe_ratio, sortino_ratio and max_drawdown
+        (percent, negative); None where there is not enough data
+    """
+    metrics: Dict[str, Optional[float]] = dict.fromkeys(
+        ("ytd_return_percent", "one_year_return_percent", "volatility", "sharpe_ratio", "sortino_ratio", "max_drawdown")
+    )
+    nav = np.asarray(values, dtype=float)
+    if nav.size < 2 or len(dates) != nav.size:
+        return metrics
+
+    days = np.asarray(dates, dtype="datetime64[D]")
+    last_day = days[-1]
+    last = nav[-1]
+
+    # YTD: from the last close of the previous year (or the first point of this year)
+    year = (as_of or last_day.astype(object)).year
+    year_start = np.datetime64(f"{year}-01-01", "D")
+    ytd_base = np.searchsorted(days, year_start) - 1
+    if ytd_base < 0:
+        ytd_base = 0 if days[0] >= year_start else None
+    if ytd_base is not None and ytd_base < nav.size - 1:
+        metrics["ytd_return_percent"] = _pct(last / nav[ytd_base] - 1)
+
+    # 1Y: from the last point on or before the same day a year earlier
+    one_year_ago = last_day - np.timedelta64(365, "D")
+    one_year_base = np.searchsorted(days, one_year_ago, side="right") - 1
+    if one_year_base >= 0 or days[0] - one_year_ago <= np.timedelta64(7, "D"):
+        metrics["one_year_return_percent"] = _pct(last / nav[max(one_year_base, 0)] - 1)
+
+    returns = nav[1:] / nav[:-1] - 1
+    if returns.size >= 2:
+        daily_rf = risk_free_rate / TRADING_DAYS_PER_YEAR
+        excess = returns - daily_rf
+        std = returns.std(ddof=1)
+        metrics["volatility"] = _pct(std * np.sqrt(TRADING_DAYS_PER_YEAR))
+        if std > 0:
+            metrics["sharpe_ratio"] = _ratio(excess.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR))
+        downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2))
+        if downside > 0:
+            metrics["sortino_ratio"] = _ratio(excess.mean() / downside * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+    running_max = np.maximum.accumulate(nav)
+    metrics["max_drawdown"] = _pct((nav / running_max - 1).min())
+    return metrics
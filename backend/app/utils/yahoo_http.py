@@ -0,0 +1,112 @@
+"""
+Async Yahoo Finance quote provider over HTTP
+
+Quotes are read from Yahoo's chart API with httpx directly on the event
+loop: no worker thread is held while waiting on the network, requests for
+all symbols run concurrently (capped by the connection pool size), and each
+request has its own timeout. Symbols that fail are left out of the result
+so the caller can fall back to yfinance for just those.
+"""
+
+import asyncio
+import math
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def _finite(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+class YahooHTTPProvider:
+    """
+    Async quote client for the Yahoo chart API
+
+    Args:
+        timeout: Seconds allowed per request (connect + read)
+        max_connections: Concurrent requests to Yahoo
+    """
+
+    def __init__(self, timeout: float = 10.0, max_connections: int = 8):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def get_quote(self, symbol: str) -> Dict[str, Any]:
+        """
+        Last price and previous close for one symbol
+
+        Returns:
+            Dict with symbol, current_price, previous_close and change_percent
+
+        Raises:
+            httpx.HTTPError or ValueError if Yahoo has no usable data
+        """
+        response = await self._get_client().get(
+            CHART_URL.format(symbol=symbol), params={"range": "5d", "interval": "1d"}
+        )
+        response.raise_for_status()
+        results = (response.json().get("chart") or {}).get("result") or []
+        if not results:
+            raise ValueError(f"No chart data for {symbol}")
+        result = results[0]
+        quote = ((result.get("indicators") or {}).get("quote") or [{}])[0]
+        closes = [c for c in (_finite(v) for v in quote.get("close") or []) if c is not None]
+        current_price = _finite((result.get("meta") or {}).get("regularMarketPrice"))
+        if current_price is None:
+            if not closes:
+                raise ValueError(f"No price for {symbol}")
+            current_price = closes[-1]
+        # Same convention as the yfinance download: the second-to-last daily bar
+        previous_close = closes[-2] if len(closes) >= 2 else None
+        change_percent = ((current_price - previous_close) / previous_close * 100) if previous_close else 0
+        return {
+            "symbol": symbol,
+            "current_price": current_price,
+            "previous_close": previous_close,
+            "change_percent": change_percent,
+        }
+
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Quotes for many symbols concurrently
+
+        Returns:
+            Dict of symbol -> quote for the symbols that succeeded
+        """
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self.get_quote(symbol) for symbol in symbols), return_exceptions=True)
+        quotes = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, BaseException):
+                print(f"Yahoo HTTP quote failed for {symbol}: {result!r}")
+            else:
+                quotes[symbol] = result
+        return quotes
+
+    async def close(self):
+        """Close the HTTP connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# Global provider instance
+yahoo_http = YahooHTTPProvider(timeout=settings.YAHOO_HTTP_TIMEOUT, max_connections=settings.IO_PER_HOST_LIMIT)
@@ -2,71 +2,142 @@
 yfinance client for fetching stock data
 """
 
+import math
 import yfinance as yf
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import pandas as pd
+from app.core.cache import cache, symbol_tag
+from app.core.ttl_policy import REFERENCE_TTL
+from app.utils.nav import normalize, performance_frame, price_matrix
+from app.utils.price_store import PERIOD_DAYS, period_start, price_store
+
+# Static metadata fields taken from Ticker.info (name -> info key)
+REFERENCE_FIELDS = {
+    "name": "longName",
+    "market_cap": "marketCap",
+    "pe_ratio": "trailingPE",
+    "dividend_yield": "dividendYield",
+    "beta": "beta",
+    "sector": "sector",
+    "industry": "industry",
+}
+
+def _empty_quote(symbol: str) -> Dict[str, Any]:
+    return {"symbol": symbol, "current_price": 0, "previous_close": None, "change_percent": 0}
+
+def _ticker_frame(data: pd.DataFrame, symbol: str, single: bool) -> pd.DataFrame:
+    """Columns of one symbol from a group_by='ticker' download"""
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        return data[symbol]
+    return data if single else pd.DataFrame()
 
 class YFinanceClient:
     """Client for fetching stock data from Yahoo Finance"""
     
     @staticmethod
-    def get_stock_info(symbol: str) -> Dict[str, Any]:
-        """Get current stock information"""
-        try:
-            ticker = yf.Ticker(symbol)
-            
-            # Use fast_info for current price (more reliable)
-            try:
-                current_price = ticker.fast_info.last_price
-            except:
-                # Fallback to history if fast_info fails
-                hist = ticker.history(period="1d")
-                current_price = hist['Close'].iloc[-1] if not hist.empty else 0
-            
-            # Get previous close for change calculation
-            try:
-                hist = ticker.history(period="5d")
-                if len(hist) >= 2:
-                    prev_close = hist['Close'].iloc[-2]
-                    change_percent = ((current_price - prev_close) / prev_close * 100) if prev_close > 0 else 0
-                else:
-                    change_percent = 0
-            except:
-                change_percent = 0
-            
-            # Get info dict for other data (less reliable but needed for fundamentals)
-            try:
-                info = ticker.info
-            except:
-                info = {}
+    def get_quotes(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Last price and previous close for many symbols in one multi-ticker download
+        
+        Args:
+            symbols: Stock ticker symbols
             
-            return {
-                "symbol": symbol,
-                "name": info.get("longName", symbol),
-                "current_price": float(current_price) if current_price else 0,
-                "change_percent": float(change_percent) if change_percent else 0,
-                "market_cap": info.get("marketCap"),
-                "pe_ratio": info.get("trailingPE"),
-                "dividend_yield": info.get("dividendYield"),
-                "beta": info.get("beta"),
-                "sector": info.get("sector"),
-                "industry": info.get("industry"),
-            }
+        Returns:
+            Dict of symbol -> {symbol, current_price, previous_close, change_percent};
+            symbols without data get a zero price
+        """
+        symbols = list(dict.fromkeys(symbols))
+        quotes = {symbol: _empty_quote(symbol) for symbol in symbols}
+        if not symbols:
+            return quotes
+        try:
+            data = yf.download(symbols, period="5d", interval="1d", group_by="ticker", progress=False, threads=True)
         except Exception as e:
-            print(f"Error fetching {symbol}: {e}")
-            return {
+            print(f"Error fetching quotes: {e}")
+            return quotes
+        
+        for symbol in symbols:
+            frame = _ticker_frame(data, symbol, len(symbols) == 1)
+            closes = frame["Close"].dropna() if "Close" in frame else pd.Series(dtype=float)
+            if closes.empty:
+                continue
+            current_price = float(closes.iloc[-1])
+            previous_close = float(closes.iloc[-2]) if len(closes) >= 2 else None
+            change_percent = ((current_price - previous_close) / previous_close * 100) if previous_close else 0
+            quotes[symbol] = {
                 "symbol": symbol,
-                "name": symbol,
-                "current_price": 0,
-                "change_percent": 0,
-                "market_cap": None,
-                "pe_ratio": None,
-                "dividend_yield": None,
-                "beta": None,
-                "sector": None,
-                "industry": None,
+                "current_price": current_price,
+                "previous_close": previous_close,
+                "change_percent": change_percent,
             }
+        return quotes
+    
+    @staticmethod
+    def _reference_key(symbol: str) -> str:
+        return f"yfinance:reference:{symbol}"
+    
+    @staticmethod
+    def default_quote(symbol: str) -> Dict[str, Any]:
+        """Stand-in quote (zero price) for a symbol that could not be priced"""
+        return _empty_quote(symbol)
+    
+    @staticmethod
+    def default_reference(symbol: str) -> Dict[str, Any]:
+        """Stand-in reference data when Yahoo has none (or did not answer in time)"""
+        return {
+            **{field: None for field in REFERENCE_FIELDS},
+            "name": symbol,
+            "sector": "N/A",
+            "industry": "N/A",
+        }
+    
+    @staticmethod
+    def get_cached_reference(symbol: str) -> Optional[Dict[str, Any]]:
+        """Reference data from the daily cache only (None on a miss)"""
+        return cache.get(YFinanceClient._reference_key(symbol))
+    
+    @staticmethod
+    def get_reference(symbol: str) -> Dict[str, Any]:
+        """
+        Static metadata (name, sector, industry, market cap, beta, P/E, dividend yield)
+        
+        Sector and industry essentially never change, so Ticker.info is read at
+        most once a day per symbol (REFERENCE_TTL) instead of on every refresh.
+        """
+        cache_key = YFinanceClient._reference_key(symbol)
+        reference = cache.get(cache_key)
+        if reference is not None:
+            return reference
+        try:
+            info = yf.Ticker(symbol).info or {}
+        except Exception as e:
+            print(f"Error fetching reference data for {symbol}: {e}")
+            # Not cached, so the next refresh retries
+            return YFinanceClient.default_reference(symbol)
+        
+        reference = {field: info.get(key) for field, key in REFERENCE_FIELDS.items()}
+        reference["name"] = reference["name"] or symbol
+        # Yahoo occasionally returns NaN/Infinity for ratios, which is not JSON-serializable
+        for field, value in reference.items():
+            if isinstance(value, float) and not math.isfinite(value):
+                reference[field] = None
+        cache.set(cache_key, reference, ttl=REFERENCE_TTL, persist=True, tags=[symbol_tag(symbol)])
+        return reference
+    
+    @staticmethod
+    def get_stock_info(symbol: str) -> Dict[str, Any]:
+        """Get current stock information (quote plus daily-cached reference data)"""
+        quote = YFinanceClient.get_quotes([symbol])[symbol]
+        reference = YFinanceClient.get_reference(symbol)
+        return {
+            "symbol": symbol,
+            **reference,
+            "current_price": quote["current_price"],
+            "change_percent": quote["change_percent"],
+        }
     
     @staticmethod
     def get_historical_data(symbols: List[str], period: str = "1y") -> pd.DataFrame:
@@ -79,74 +150,67 @@ class YFinanceClient:
             return pd.DataFrame()
     
     @staticmethod
-    def get_portfolio_performance(symbols: List[str], period: str = "1y") -> Dict[str, Any]:
-        """Calculate portfolio performance vs benchmarks"""
-        try:
-            # Fetch portfolio stocks + benchmarks
-            all_symbols = symbols + ["SPY", "QQQ"]
-            data = yf.download(all_symbols, period=period, group_by='ticker', progress=False)
-            
-            if data.empty:
-                return {
-                    "dates": [],
-                    "portfolio_values": [],
-                    "sp500_values": [],
-                    "nasdaq_values": []
-                }
-            
-            # Calculate equal-weighted portfolio
-            portfolio_prices = []
-            for symbol in symbols:
-                try:
-                    if len(symbols) == 1:
-                        prices = data['Close']
-                    else:
-                        prices = data[symbol]['Close']
-                    portfolio_prices.append(prices)
-                except:
-                    continue
+    def get_portfolio_performance(
+        symbols: List[str],
+        period: str = "1y",
+        shares: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Calculate portfolio performance vs benchmarks
+        
+        Args:
+            symbols: Portfolio symbols
+            period: yfinance period
+            shares: Shares held per symbol; without it the portfolio is an
+                equal-dollar buy-and-hold of the symbols at the start of the period
             
-            if not portfolio_prices:
-                return {
-                    "dates": [],
-                    "portfolio_values": [],
-                    "sp500_values": [],
-                    "nasdaq_values": []
-                }
+        Returns:
+            Dict of dates and portfolio/S&P 500/Nasdaq 100 values, each rebased to 100
+        """
+        empty = {
+            "dates": [],
+            "portfolio_values": [],
+            "sp500_values": [],
+            "nasdaq_values": []
+        }
+        try:
+            # Portfolio stocks + benchmarks from the local price store; periods it
+            # does not cover (e.g. "max") fall back to one direct download
+            benchmarks = {"sp500_values": "SPY", "nasdaq_values": "QQQ"}
+            all_symbols = list(dict.fromkeys(symbols + list(benchmarks.values())))
+            if period in PERIOD_DAYS or period == "ytd":
+                prices = price_store.prices(all_symbols, period_start(period))
+            else:
+                data = yf.download(all_symbols, period=period, progress=False)
+                prices = price_matrix(data, all_symbols)
             
-            # Average portfolio performance
-            portfolio_df = pd.concat(portfolio_prices, axis=1).mean(axis=1)
-            portfolio_normalized = (portfolio_df / portfolio_df.iloc[0]) * 100
+            portfolio_prices = prices.reindex(columns=[s for s in symbols if s in prices.columns])
+            if portfolio_prices.empty or portfolio_prices.dropna(how="all").empty:
+                return empty
             
-            # Benchmark performance
-            if len(symbols) == 1:
-                spy_prices = data['Close']
-                qqq_prices = data['Close']
+            if shares is None:
+                first_prices = portfolio_prices.bfill().iloc[0]
+                shares_held = (1.0 / first_prices).replace([float("inf")], float("nan")).dropna()
             else:
-                spy_prices = data['SPY']['Close']
-                qqq_prices = data['QQQ']['Close']
-            
-            spy_normalized = (spy_prices / spy_prices.iloc[0]) * 100
-            qqq_normalized = (qqq_prices / qqq_prices.iloc[0]) * 100
+                shares_held = pd.Series(shares, dtype=float)
             
-            # Format dates
-            dates = [d.strftime("%Y-%m-%d") for d in portfolio_df.index]
+            frame = performance_frame(
+                portfolio_prices,
+                shares_held,
+                {key: prices[symbol] for key, symbol in benchmarks.items() if symbol in prices.columns},
+            )
+            if frame.empty:
+                return empty
             
             return {
-                "dates": dates,
-                "portfolio_values": portfolio_normalized.tolist(),
-                "sp500_values": spy_normalized.tolist(),
-                "nasdaq_values": qqq_normalized.tolist()
+                "dates": frame.index.strftime("%Y-%m-%d").tolist(),
+                "portfolio_values": normalize(frame["portfolio"]).tolist(),
+                **{key: frame[key].tolist() if key in frame else [] for key in benchmarks},
             }
         
         except Exception as e:
             print(f"Error calculating portfolio performance: {e}")
-            return {
-                "dates": [],
-                "portfolio_values": [],
-                "sp500_values": [],
-                "nasdaq_values": []
-            }
+            return empty
 
 # Global client instance
 yfinance_client = YFinanceClient()
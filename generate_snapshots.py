@@ -3,10 +3,9 @@ Generate initial CSV snapshots for both portfolios.
 This creates fallback cache files that will be committed to GitHub.
 """
 
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
-import time
+import market_data
 
 # Persistent Value Portfolio
 persistent_tickers = {
@@ -58,89 +57,6 @@ olivia_tickers = {
     'PLTR': {'cost_basis': 39.00, 'shares': 4298}
 }
 
-def get_stock_data(ticker):
-    """Get comprehensive stock data from yfinance"""
-    try:
-        time.sleep(0.5)  # Rate limiting
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Get company info
-        security_name = info.get('longName', ticker)
-        sector = info.get('sector', 'N/A')
-        industry = info.get('industry', 'N/A')
-        
-        # Get recent price data
-        recent_data = stock.history(period="5d", interval="1d")
-        
-        if len(recent_data) >= 2:
-            current_price = recent_data['Close'].iloc[-1]
-            previous_close = recent_data['Close'].iloc[-2]
-            daily_change_pct = ((current_price - previous_close) / previous_close) * 100
-        else:
-            current_price = recent_data['Close'].iloc[-1] if len(recent_data) > 0 else None
-            daily_change_pct = 0.0
-        
-        # Get YTD data
-        current_year = datetime.now().year
-        start_date = f"{current_year}-01-01"
-        ytd_data = stock.history(start=start_date)
-        
-        if len(ytd_data) > 0:
-            year_start_price = ytd_data['Close'].iloc[0]
-            if current_price and year_start_price:
-                ytd_pct_change = ((current_price - year_start_price) / year_start_price) * 100
-            else:
-                ytd_pct_change = 0.0
-        else:
-            ytd_pct_change = 0.0
-        
-        # Get 52-week data
-        year_data = stock.history(period="1y", interval="1d")
-        
-        if len(year_data) > 0:
-            week_52_high = year_data['High'].max()
-            week_52_low = year_data['Low'].min()
-            one_year_ago_price = year_data['Close'].iloc[0]
-            
-            if current_price and one_year_ago_price:
-                yoy_pct_change = ((current_price - one_year_ago_price) / one_year_ago_price) * 100
-            else:
-                yoy_pct_change = 0.0
-            
-            if current_price and week_52_high:
-                pct_below_52wk_high = ((week_52_high - current_price) / week_52_high) * 100
-            else:
-                pct_below_52wk_high = 0.0
-            
-            if current_price and week_52_high and week_52_low and week_52_high != week_52_low:
-                chan_range_pct = ((current_price - week_52_low) / (week_52_high - week_52_low)) * 100
-            else:
-                chan_range_pct = 0.0
-        else:
-            yoy_pct_change = 0.0
-            pct_below_52wk_high = 0.0
-            chan_range_pct = 0.0
-            week_52_high = 0
-            week_52_low = 0
-        
-        return {
-            'security_name': security_name,
-            'current_price': current_price,
-            'daily_change_pct': daily_change_pct,
-            'ytd_pct_change': ytd_pct_change,
-            'yoy_pct_change': yoy_pct_change,
-            'pct_below_52wk_high': pct_below_52wk_high,
-            'chan_range_pct': chan_range_pct,
-            'week_52_high': week_52_high,
-            'week_52_low': week_52_low,
-            'sector': sector,
-            'industry': industry
-        }
-    except Exception as e:
-        print(f"  ❌ Error fetching {ticker}: {str(e)}")
-        return None
-
 def generate_snapshot(tickers_dict, portfolio_name):
     """Generate CSV snapshot for a portfolio"""
     print(f"\n{'='*80}")
@@ -149,9 +65,13 @@ def generate_snapshot(tickers_dict, portfolio_name):
     
     portfolio_data = []
     
+    # One batched price download for the whole portfolio; names/sectors from the daily reference cache
+    print(f"  Fetching {len(tickers_dict)} tickers...")
+    stock_data_by_ticker = {d['ticker']: d for d in market_data.get_stock_data_batch(list(tickers_dict))}
+    
     for ticker, info in tickers_dict.items():
-        print(f"  Fetching {ticker}...", end=" ")
-        stock_data = get_stock_data(ticker)
+        print(f"  {ticker}...", end=" ")
+        stock_data = stock_data_by_ticker.get(ticker)
         
         if stock_data:
             cost_basis = info['cost_basis']
@@ -0,0 +1,254 @@
+"""
+Batched market data for the Streamlit pages and the snapshot generator
+
+Daily history comes from the local price store shared with the backend
+(backend/app/utils/price_store.py): completed sessions are kept on disk and
+topped up with one small delta download a day. The current session is taken
+from ONE short multi-ticker download, so a year of bars (current price, daily
+change, YTD, YoY and the 52-week range) costs a few days of data per refresh.
+Static metadata (name, sector, industry) essentially never
+changes, so it is read from Yahoo's ``.info`` at most once a day per ticker
+and kept in reference_cache.json.
+
+The pages' MotherDuck queries go through the backend's connection pool
+(backend/app/utils/motherduck_pool.py), exposed here as motherduck_pool.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+REFERENCE_CACHE_FILE = "reference_cache.json"
+BACKEND_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "app", "utils")
+
+
+def _load_backend_module(name: str, filename: str):
+    """Import a dependency-light backend module without the backend package on sys.path"""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_UTILS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+price_store_module = _load_backend_module("jcn_price_store", "price_store.py")
+price_store = price_store_module.price_store
+
+# One pooled MotherDuck connection per process: per-thread cursors, bounded concurrency
+motherduck_pool = _load_backend_module("jcn_motherduck_pool", "motherduck_pool.py").motherduck_pool
+
+# .info fields kept in the reference table
+REFERENCE_FIELDS = {
+    'longName': 'security_name',
+    'sector': 'sector',
+    'industry': 'industry',
+    'marketCap': 'market_cap',
+    'beta': 'beta',
+    'trailingPE': 'pe_ratio',
+    'dividendYield': 'dividend_yield',
+}
+
+
+def _ticker_frame(data: pd.DataFrame, ticker: str, single: bool) -> pd.DataFrame:
+    """Columns of one ticker from a group_by='ticker' download"""
+    if isinstance(data.columns, pd.MultiIndex):
+        if ticker not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        return data[ticker]
+    return data if single else pd.DataFrame()
+
+
+def _pct_change(new, old) -> float:
+    return ((new - old) / old) * 100 if new and old else 0.0
+
+
+def price_stats(history: pd.DataFrame) -> Optional[dict]:
+    """Current price, daily change, YTD/YoY change and 52-week range from a year of daily bars"""
+    history = history.dropna(subset=['Close'])
+    if history.empty:
+        return None
+
+    closes = history['Close']
+    current_price = float(closes.iloc[-1])
+    daily_change_pct = _pct_change(current_price, float(closes.iloc[-2])) if len(closes) >= 2 else 0.0
+
+    this_year = closes[closes.index.year == datetime.now().year]
+    ytd_pct_change = _pct_change(current_price, float(this_year.iloc[0])) if len(this_year) > 0 else 0.0
+    yoy_pct_change = _pct_change(current_price, float(closes.iloc[0]))
+
+    week_52_high = float(history['High'].max())
+    week_52_low = float(history['Low'].min())
+    pct_below_52wk_high = ((week_52_high - current_price) / week_52_high) * 100 if week_52_high else 0.0
+    if week_52_high and week_52_low and week_52_high != week_52_low:
+        chan_range_pct = ((current_price - week_52_low) / (week_52_high - week_52_low)) * 100
+    else:
+        chan_range_pct = 0.0
+
+    return {
+        'current_price': current_price,
+        'daily_change_pct': daily_change_pct,
+        'ytd_pct_change': ytd_pct_change,
+        'yoy_pct_change': yoy_pct_change,
+        'pct_below_52wk_high': pct_below_52wk_high,
+        'chan_range_pct': chan_range_pct,
+        'week_52_high': week_52_high,
+        'week_52_low': week_52_low,
+    }
+
+
+def _adjusted_history(bars: pd.DataFrame) -> pd.DataFrame:
+    """Stored bars -> split/dividend-adjusted OHLC frame like an auto_adjust download"""
+    factor = bars['adj_close'] / bars['close']
+    return pd.DataFrame({
+        'Open': bars['open'] * factor,
+        'High': bars['high'] * factor,
+        'Low': bars['low'] * factor,
+        'Close': bars['adj_close'],
+        'Volume': bars['volume'],
+    }).set_axis(pd.to_datetime(bars['date']))
+
+
+def get_price_stats(tickers: List[str]) -> Dict[str, dict]:
+    """
+    Price statistics for many tickers from the price store plus one live download
+
+    Args:
+        tickers: Ticker symbols
+
+    Returns:
+        Dict of ticker -> price_stats(); tickers without data are omitted
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    stored = price_store.bars(tickers, price_store_module.period_start("1y"))
+
+    # Sessions after the last stored day (today's, while it is still trading)
+    try:
+        live = yf.download(
+            tickers, period="5d", interval="1d", group_by='ticker',
+            auto_adjust=True, progress=False, threads=True,
+        )
+    except Exception as e:
+        print(f"Live price download failed: {e}")
+        live = None
+
+    results = {}
+    for ticker, bars in stored.groupby('symbol', sort=False):
+        history = _adjusted_history(bars)
+        if live is not None and not live.empty:
+            recent = _ticker_frame(live, ticker, len(tickers) == 1)
+            if not recent.empty:
+                recent = recent.set_axis(pd.DatetimeIndex(recent.index).tz_localize(None).normalize())
+                recent = recent[recent.index > history.index.max()].dropna(subset=['Close'])
+                if not recent.empty:
+                    history = pd.concat([history, recent])
+        stats = price_stats(history)
+        if stats is not None:
+            results[ticker] = stats
+    return results
+
+
+def get_close_history(tickers: List[str], period: str = "1y") -> pd.DataFrame:
+    """
+    Adjusted daily closes for tickers over a yfinance-style period, from the price store
+
+    Returns:
+        DataFrame indexed by date with one column per ticker that has data
+    """
+    return price_store.prices(tickers, price_store_module.period_start(period))
+
+
+def load_reference_cache() -> Dict[str, dict]:
+    """Load the reference table (ticker -> metadata + fetched_date)"""
+    try:
+        if os.path.exists(REFERENCE_CACHE_FILE):
+            with open(REFERENCE_CACHE_FILE, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Could not load reference cache: {e}")
+    return {}
+
+
+def save_reference_cache(reference: Dict[str, dict]):
+    """Save the reference table (temp file + atomic rename)"""
+    try:
+        tmp_path = f"{REFERENCE_CACHE_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(reference, f)
+        os.replace(tmp_path, REFERENCE_CACHE_FILE)
+    except Exception as e:
+        print(f"Could not save reference cache: {e}")
+
+
+def fetch_reference(ticker: str) -> Optional[dict]:
+    """Static metadata for one ticker from Yahoo's .info"""
+    try:
+        info = yf.Ticker(ticker).info or {}
+    except Exception as e:
+        print(f"Could not fetch reference data for {ticker}: {e}")
+        return None
+    record = {field: info.get(key) for key, field in REFERENCE_FIELDS.items()}
+    record['security_name'] = record['security_name'] or ticker
+    record['fetched_date'] = date.today().isoformat()
+    return record
+
+
+def get_reference_data(tickers: List[str], max_workers: int = 8) -> Dict[str, dict]:
+    """
+    Reference metadata for tickers, refreshed at most once a day per ticker
+
+    Args:
+        tickers: Ticker symbols
+        max_workers: Concurrent .info requests for tickers not fetched today
+
+    Returns:
+        Dict of ticker -> metadata (stale entries are kept if a refresh fails)
+    """
+    reference = load_reference_cache()
+    today = date.today().isoformat()
+    missing = [t for t in dict.fromkeys(tickers) if reference.get(t, {}).get('fetched_date') != today]
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(fetch_reference, missing))
+        updated = {t: record for t, record in zip(missing, fetched) if record is not None}
+        if updated:
+            reference.update(updated)
+            save_reference_cache(reference)
+
+    return {t: reference[t] for t in tickers if t in reference}
+
+
+def get_stock_data_batch(tickers: List[str], max_workers: int = 8) -> List[dict]:
+    """
+    Everything the portfolio tables need, for all tickers at once
+
+    Returns:
+        List of dicts (ticker, security_name, price stats, sector, industry) for
+        tickers with price data, in input order
+    """
+    prices = get_price_stats(tickers)
+    reference = get_reference_data(list(prices), max_workers=max_workers)
+
+    results = []
+    for ticker in tickers:
+        if ticker not in prices:
+            continue
+        ref = reference.get(ticker, {})
+        results.append({
+            'ticker': ticker,
+            'security_name': ref.get('security_name') or ticker,
+            **prices[ticker],
+            'sector': ref.get('sector') or 'N/A',
+            'industry': ref.get('industry') or 'N/A',
+        })
+    return results
@@ -11,11 +11,11 @@ import json
 import os
 import finnhub
 import requests
-import duckdb
 import math
 from scipy import stats
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import market_data
 
 # Page configuration
 st.set_page_config(
@@ -738,14 +738,10 @@ def get_portfolio_aggregated_metrics(fundamentals_df):
         st.error(f"Error calculating aggregated metrics: {str(e)}")
         return None
 
-# Cached MotherDuck connection (singleton pattern)
-@st.cache_resource
+# Pooled MotherDuck connection (per-thread cursors shared across all sessions)
 def get_motherduck_connection():
-    """Create a singleton MotherDuck connection shared across all users"""
-    motherduck_token = os.getenv('MOTHERDUCK_TOKEN')
-    if not motherduck_token:
-        raise ValueError("MOTHERDUCK_TOKEN not configured in Railway environment")
-    return duckdb.connect(f'md:?motherduck_token={motherduck_token}')
+    """This thread's MotherDuck cursor from the shared pool; each execute() takes a pool slot"""
+    return market_data.motherduck_pool.cursor()
 
 @st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour
 def get_fundamentals_from_motherduck(tickers, portfolio_df):
@@ -11,11 +11,10 @@ import json
 import os
 import finnhub
 import requests
-import duckdb
 import math
 from scipy import stats
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import market_data
 
 # Page configuration
 st.set_page_config(
@@ -184,128 +183,14 @@ if 'selected_period' not in st.session_state:
 # Extract valid tickers from current portfolio data
 tickers = [ticker.strip().upper() for ticker in st.session_state.portfolio_data['Symbol'].dropna().tolist() if ticker.strip()]
 
-# Helper function to get comprehensive stock data with caching
-@st.cache_data(ttl=300, show_spinner=False, persist="disk")  # Cache for 5 minutes, persist across restarts
-def get_comprehensive_stock_data(ticker):
-    """Get all required stock data from yfinance (cached for 5 minutes)"""
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Get company info
-        security_name = info.get('longName', ticker)
-        sector = info.get('sector', 'N/A')
-        industry = info.get('industry', 'N/A')
-        
-        # Get recent price data for current price and daily change
-        recent_data = stock.history(period="5d", interval="1d")
-        
-        if len(recent_data) >= 2:
-            current_price = recent_data['Close'].iloc[-1]
-            previous_close = recent_data['Close'].iloc[-2]
-            daily_change_pct = ((current_price - previous_close) / previous_close) * 100
-        else:
-            current_price = recent_data['Close'].iloc[-1] if len(recent_data) > 0 else None
-            daily_change_pct = 0.0
-        
-        # Get year-to-date data
-        current_year = datetime.now().year
-        start_date = f"{current_year}-01-01"
-        ytd_data = stock.history(start=start_date)
-        
-        if len(ytd_data) > 0:
-            year_start_price = ytd_data['Close'].iloc[0]
-            if current_price and year_start_price:
-                ytd_pct_change = ((current_price - year_start_price) / year_start_price) * 100
-            else:
-                ytd_pct_change = 0.0
-        else:
-            ytd_pct_change = 0.0
-        
-        # Get 52-week high/low and year-over-year data
-        year_data = stock.history(period="1y", interval="1d")
-        
-        if len(year_data) > 0:
-            week_52_high = year_data['High'].max()
-            week_52_low = year_data['Low'].min()
-            one_year_ago_price = year_data['Close'].iloc[0]
-            
-            # Calculate YoY % change
-            if current_price and one_year_ago_price:
-                yoy_pct_change = ((current_price - one_year_ago_price) / one_year_ago_price) * 100
-            else:
-                yoy_pct_change = 0.0
-            
-            # Calculate % Below 52wk High
-            if current_price and week_52_high:
-                pct_below_52wk_high = ((week_52_high - current_price) / week_52_high) * 100
-            else:
-                pct_below_52wk_high = 0.0
-            
-            # Calculate 52wk Chan Range (position within range)
-            if current_price and week_52_high and week_52_low and week_52_high != week_52_low:
-                chan_range_pct = ((current_price - week_52_low) / (week_52_high - week_52_low)) * 100
-            else:
-                chan_range_pct = 0.0
-        else:
-            yoy_pct_change = 0.0
-            pct_below_52wk_high = 0.0
-            chan_range_pct = 0.0
-        
-        return {
-            'ticker': ticker,
-            'security_name': security_name,
-            'current_price': current_price,
-            'daily_change_pct': daily_change_pct,
-            'ytd_pct_change': ytd_pct_change,
-            'yoy_pct_change': yoy_pct_change,
-            'pct_below_52wk_high': pct_below_52wk_high,
-            'chan_range_pct': chan_range_pct,
-            'week_52_high': week_52_high if len(year_data) > 0 else 0,
-            'week_52_low': week_52_low if len(year_data) > 0 else 0,
-            'sector': sector,
-            'industry': industry
-        }
-    except Exception as e:
-        # Silent error handling - return None to indicate failure
-        return None
-
 @st.cache_data(ttl=300, show_spinner=False)
 def fetch_all_stocks_parallel(tickers, max_workers=10):
-    """Fetch all stocks in parallel with progress bar"""
-    stock_data_list = []
-    
-    # Create progress indicators
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text(f"Loading {len(tickers)} stocks in parallel...")
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_ticker = {
-            executor.submit(get_comprehensive_stock_data, ticker): ticker 
-            for ticker in tickers
-        }
-        
-        # Collect results as they complete
-        completed = 0
-        total = len(tickers)
-        
-        for future in as_completed(future_to_ticker):
-            result = future.result()
-            if result is not None:
-                stock_data_list.append(result)
-            
-            completed += 1
-            progress = completed / total
-            progress_bar.progress(progress)
-            status_text.text(f"Loaded {completed}/{total} stocks")
-    
-    # Clear progress indicators
-    progress_bar.empty()
-    status_text.empty()
-    
-    return stock_data_list
+    """
+    Fetch all stocks at once: prices from one multi-ticker download, names and
+    sectors from the daily reference cache (only new tickers hit .info)
+    """
+    with st.spinner(f"Loading {len(tickers)} stocks..."):
+        return market_data.get_stock_data_batch(tickers, max_workers=max_workers)
 
 # ============================================================================
 # BENCHMARK CALCULATION FUNCTIONS
@@ -739,14 +624,10 @@ def get_portfolio_aggregated_metrics(fundamentals_df):
         st.error(f"Error calculating aggregated metrics: {str(e)}")
         return None
 
-# Cached MotherDuck connection (singleton pattern)
-@st.cache_resource
+# Pooled MotherDuck connection (per-thread cursors shared across all sessions)
 def get_motherduck_connection():
-    """Create a singleton MotherDuck connection shared across all users"""
-    motherduck_token = os.getenv('MOTHERDUCK_TOKEN')
-    if not motherduck_token:
-        raise ValueError("MOTHERDUCK_TOKEN not configured in Railway environment")
-    return duckdb.connect(f'md:?motherduck_token={motherduck_token}')
+    """This thread's MotherDuck cursor from the shared pool; each execute() takes a pool slot"""
+    return market_data.motherduck_pool.cursor()
 
 @st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour
 def get_fundamentals_from_motherduck(tickers, portfolio_df):
@@ -2130,15 +2011,13 @@ if tickers and len(tickers) > 0:
             
             period = time_options[st.session_state.selected_period]
             
-            stock_data = {}
-            for ticker in tickers:
-                try:
-                    stock = yf.Ticker(ticker)
-                    data = stock.history(period=period)
-                    if not data.empty:
-                        stock_data[ticker] = data['Close']
-                except:
-                    pass
+            # Adjusted closes for all tickers in one range scan of the local price store
+            try:
+                closes = market_data.get_close_history(tickers, period)
+            except Exception as e:
+                print(f"Could not load price history: {e}")
+                closes = pd.DataFrame()
+            stock_data = {ticker: closes[ticker] for ticker in closes.columns}
             
             if stock_data:
                 df = pd.DataFrame(stock_data).dropna()
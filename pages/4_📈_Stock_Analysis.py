@@ -1,12 +1,12 @@
 import streamlit as st
 from PIL import Image
-import duckdb
 import os
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
+import market_data
 
 st.set_page_config(
     page_title="Stock Analysis - JCN Dashboard",
@@ -14,14 +14,10 @@ st.set_page_config(
     layout="wide"
 )
 
-# Cached MotherDuck connection (singleton pattern)
-@st.cache_resource
+# Pooled MotherDuck connection (per-thread cursors shared across all sessions)
 def get_motherduck_connection():
-    """Create a singleton MotherDuck connection shared across all users"""
-    motherduck_token = os.getenv('MOTHERDUCK_TOKEN')
-    if not motherduck_token:
-        raise ValueError("MOTHERDUCK_TOKEN not configured in Railway environment")
-    return duckdb.connect(f'md:?motherduck_token={motherduck_token}')
+    """This thread's MotherDuck cursor from the shared pool; each execute() takes a pool slot"""
+    return market_data.motherduck_pool.cursor()
 
 @st.cache_data(ttl=1800, show_spinner=False)  # Cache for 30 minutes
 def get_stock_info_from_motherduck(ticker):